@@ -0,0 +1,112 @@
+"""
+Shared fixtures for the benchmark suite.
+
+Query benchmarks run against a Postgres seeded once per session with
+``SEED_USERS`` users of ``SEED_TODOS_PER_USER`` todos each. Point
+``BENCH_DATABASE_URL`` at an existing (throwaway) database to skip the
+container; its tables are dropped and recreated.
+
+Baselines are machine-specific JSON files: record one with
+``hatch run bench-save`` and compare against it with ``hatch run
+bench-check``, which fails when a mean regresses by more than
+``BENCH_MAX_REGRESSION`` percent (15 by default).
+"""
+
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+from testcontainers.postgres import PostgresContainer
+
+from fast_zero.app import app
+from fast_zero.database import get_session
+from fast_zero.hashing import hash_password
+from fast_zero.models import User, table_registry
+from fast_zero.security import create_access_token, token_claims
+
+SEED_USERS = 1_000
+SEED_TODOS_PER_USER = 100
+BENCH_PASSWORD = "benchmark"
+
+
+@pytest.fixture(scope="session")
+def runner():
+    """One event loop for every async call timed in the suite."""
+    with asyncio.Runner() as runner:
+        yield runner
+
+
+@pytest.fixture(scope="session")
+def database_url():
+    if url := os.environ.get("BENCH_DATABASE_URL"):
+        yield url
+        return
+    with PostgresContainer("postgres:16", driver="psycopg") as postgres:
+        yield postgres.get_connection_url()
+
+
+@pytest.fixture(scope="session")
+def engine(database_url, runner):
+    engine = create_async_engine(database_url, poolclass=NullPool)
+    runner.run(_seed(engine))
+    yield engine
+    runner.run(engine.dispose())
+
+
+async def _seed(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+        # One real hash, shared by every seeded user.
+        password = hash_password(BENCH_PASSWORD)
+        await conn.execute(
+            text(
+                "INSERT INTO users (username, email, password) "
+                "SELECT 'bench' || i, 'bench' || i || '@mail.com', :password "
+                "FROM generate_series(1, :users) AS i"
+            ),
+            {"users": SEED_USERS, "password": password},
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO todos (title, description, state, user_id) "
+                "SELECT 'todo ' || i, 'description ' || i, "
+                "(ARRAY['draft', 'todo', 'doing', 'done', 'trash'])"
+                "[1 + i % 5]::todostate, u.id "
+                "FROM users AS u, generate_series(1, :todos) AS i"
+            ),
+            {"todos": SEED_TODOS_PER_USER},
+        )
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE"))
+
+
+@pytest.fixture(scope="session")
+def bench_user(engine, runner):
+    async def first_user():
+        async with AsyncSession(engine) as session:
+            return await session.get(User, 1)
+
+    return runner.run(first_user())
+
+
+@pytest.fixture(scope="session")
+def client(engine):
+    async def get_session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    with TestClient(app) as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="session")
+def auth_headers(bench_user):
+    token = create_access_token(data=token_claims(bench_user))
+    return {"Authorization": f"Bearer {token}"}
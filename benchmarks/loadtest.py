@@ -0,0 +1,391 @@
+"""
+End-to-end load test for ``fast_zero.app:app``.
+
+Migrates the database at ``DATABASE_URL``, starts uvicorn on it (unless
+``--url`` points at a server that is already running) and drives it with
+``--concurrency`` virtual users for ``--duration`` seconds. Each virtual
+user signs up and logs in, then picks operations from ``--mix`` by
+weight. Server settings such as pool sizes and feature flags are passed
+with ``--env``, so runs differing in one knob can be compared:
+
+    python -m benchmarks.loadtest --workers 4 --env DATABASE_POOL_SIZE=5
+
+Every virtual user logs in from the same address and keeps logging in
+with the same email, so the login rate limits would answer most of the
+``login`` operations with 429. The server started here gets them lifted
+(``UNLIMITED_LOGINS``); pass ``--env LOGIN_IP_BURST=...`` and friends to
+measure them instead, and mind them when using ``--url``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from uuid import uuid4
+
+import httpx
+
+ROUTES = {
+    "signup": "POST /users/",
+    "login": "POST /auth/token",
+    "list": "GET /todos/",
+    "search": "GET /todos/?q=",
+    "create": "POST /todos/",
+    "patch": "PATCH /todos/{todo_id}",
+    "delete": "DELETE /todos/{todo_id}",
+}
+DEFAULT_MIX = "signup=1,login=2,list=10,search=4,create=4,patch=3,delete=2"
+PASSWORD = "loadtest"
+WORDS = ("alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf")
+STATES = ("draft", "todo", "doing", "done")
+READY_TIMEOUT_SECONDS = 30.0
+UNLIMITED_LOGINS = {
+    "LOGIN_IP_BURST": "1000000",
+    "LOGIN_IP_PER_MINUTE": "1000000",
+    "LOGIN_EMAIL_BURST": "1000000",
+    "LOGIN_EMAIL_PER_MINUTE": "1000000",
+}
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, elapsed: float):
+        latencies = sorted(self.latencies)
+        requests = len(latencies)
+        if requests > 1:
+            cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+            p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+        else:
+            p50 = p95 = p99 = latencies[0] if latencies else 0.0
+        return {
+            "requests": requests,
+            "rps": requests / elapsed if elapsed else 0.0,
+            "p50_ms": p50 * 1000,
+            "p95_ms": p95 * 1000,
+            "p99_ms": p99 * 1000,
+            "error_rate": self.errors / requests if requests else 0.0,
+        }
+
+
+class Recorder:
+    def __init__(self):
+        self.routes = defaultdict(RouteStats)
+
+    def record(self, operation: str, seconds: float, ok: bool):
+        stats = self.routes[operation]
+        stats.latencies.append(seconds)
+        stats.errors += not ok
+
+    def report(self, elapsed: float):
+        report = {
+            operation: {"route": ROUTES[operation], **stats.summary(elapsed)}
+            for operation, stats in sorted(self.routes.items())
+        }
+        total = RouteStats(
+            [s for stats in self.routes.values() for s in stats.latencies],
+            sum(stats.errors for stats in self.routes.values()),
+        )
+        report["total"] = {"route": "*", **total.summary(elapsed)}
+        return report
+
+
+class VirtualUser:
+    """One simulated client, with its own account and todos."""
+
+    def __init__(self, client: httpx.AsyncClient, recorder, rng):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.email = None
+        self.headers = {}
+        self.todo_ids = []
+
+    async def request(self, operation, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(
+                method, url, headers=self.headers, **kwargs
+            )
+        except httpx.HTTPError:
+            self.recorder.record(operation, time.perf_counter() - start, False)
+            return None
+        self.recorder.record(
+            operation, time.perf_counter() - start, response.is_success
+        )
+        return response if response.is_success else None
+
+    async def start(self):
+        self.email = await self.signup()
+        await self.login()
+
+    async def signup(self):
+        name = f"load-{uuid4().hex}"
+        email = f"{name}@mail.com"
+        await self.request(
+            "signup",
+            "POST",
+            "/users/",
+            json={"username": name, "email": email, "password": PASSWORD},
+        )
+        return email
+
+    async def login(self):
+        response = await self.request(
+            "login",
+            "POST",
+            "/auth/token",
+            data={"username": self.email, "password": PASSWORD},
+        )
+        if response is not None:
+            token = response.json()["access_token"]
+            self.headers = {"Authorization": f"Bearer {token}"}
+
+    async def list(self):
+        await self.request("list", "GET", "/todos/", params={"limit": 20})
+
+    async def search(self):
+        await self.request(
+            "search",
+            "GET",
+            "/todos/",
+            params={"q": self.rng.choice(WORDS), "limit": 20},
+        )
+
+    async def create(self):
+        words = " ".join(self.rng.sample(WORDS, 3))
+        response = await self.request(
+            "create",
+            "POST",
+            "/todos/",
+            json={
+                "title": words,
+                "description": f"{words} {uuid4().hex}",
+                "state": self.rng.choice(STATES),
+            },
+        )
+        if response is not None:
+            self.todo_ids.append(response.json()["id"])
+
+    async def patch(self):
+        if not self.todo_ids:
+            await self.create()
+            return
+        todo_id = self.rng.choice(self.todo_ids)
+        await self.request(
+            "patch",
+            "PATCH",
+            f"/todos/{todo_id}",
+            json={"state": self.rng.choice(STATES)},
+        )
+
+    async def delete(self):
+        if not self.todo_ids:
+            await self.create()
+            return
+        todo_id = self.todo_ids.pop(self.rng.randrange(len(self.todo_ids)))
+        await self.request("delete", "DELETE", f"/todos/{todo_id}")
+
+    async def run(self, mix: dict[str, int], deadline: float):
+        operations, weights = list(mix), list(mix.values())
+        await self.start()
+        while time.perf_counter() < deadline:
+            operation = self.rng.choices(operations, weights)[0]
+            await getattr(self, operation)()
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    mix: dict[str, int],
+    concurrency: int,
+    duration: float,
+    seed=None,
+):
+    """Drive ``client`` with the given mix; return the per-route report."""
+    recorder = Recorder()
+    rng = random.Random(seed)
+    users = [
+        VirtualUser(client, recorder, random.Random(rng.random()))
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(user.run(mix, deadline) for user in users))
+    return recorder.report(time.perf_counter() - start)
+
+
+def parse_mix(value: str):
+    mix = {}
+    for item in value.split(","):
+        operation, _, weight = item.partition("=")
+        operation = operation.strip()
+        if operation not in ROUTES:
+            raise argparse.ArgumentTypeError(
+                f"unknown operation {operation!r}, "
+                f"expected one of {', '.join(ROUTES)}"
+            )
+        try:
+            mix[operation] = int(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                f"weight of {operation!r} must be an integer"
+            ) from None
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("mix needs a positive weight")
+    return {operation: weight for operation, weight in mix.items() if weight}
+
+
+def parse_env(value: str):
+    name, sep, setting = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {value}")
+    return name, setting
+
+
+@contextmanager
+def serve(args):
+    """Migrate the database and run uvicorn until the block exits."""
+    env = {**UNLIMITED_LOGINS, **os.environ, **dict(args.env)}
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        env=env,
+        check=True,
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "fast_zero.app:app",
+            "--host",
+            args.host,
+            "--port",
+            str(args.port),
+            "--workers",
+            str(args.workers),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+    try:
+        yield server
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def wait_until_ready(client: httpx.AsyncClient, server=None):
+    deadline = time.perf_counter() + READY_TIMEOUT_SECONDS
+    while time.perf_counter() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with {server.returncode}")
+        try:
+            response = await client.get("/")
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+            continue
+        if response.is_success:
+            return
+    raise RuntimeError("server did not become ready in time")
+
+
+async def _load(args, url, server=None):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=url, limits=limits, timeout=args.timeout
+    ) as client:
+        await wait_until_ready(client, server)
+        return await run_load(
+            client, args.mix, args.concurrency, args.duration, args.seed
+        )
+
+
+def print_report(report):
+    print(
+        f"{'operation':<8} {'route':<24} {'requests':>8} {'rps':>8} "
+        f"{'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'errors':>7}"
+    )
+    for operation, row in report.items():
+        print(
+            f"{operation:<8} {row['route']:<24} {row['requests']:>8} "
+            f"{row['rps']:>8.1f} {row['p50_ms']:>8.1f} "
+            f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+            f"{row['error_rate']:>7.2%}"
+        )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.loadtest",
+        description="Load test fast_zero with a mix of realistic requests.",
+    )
+    parser.add_argument(
+        "--url",
+        help="Test a server that is already running instead of starting one.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--env",
+        type=parse_env,
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Setting for the server, e.g. DATABASE_POOL_SIZE=5.",
+    )
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--duration", type=float, default=30.0, help="Seconds (default: 30)."
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix(DEFAULT_MIX),
+        help=f"Operation weights (default: {DEFAULT_MIX}).",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--json",
+        type=argparse.FileType("w", encoding="utf-8"),
+        help="Also write the run settings and report as JSON.",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.url:
+        report = asyncio.run(_load(args, args.url))
+    else:
+        with serve(args) as server:
+            url = f"http://{args.host}:{args.port}"
+            report = asyncio.run(_load(args, url, server))
+
+    print_report(report)
+    if args.json:
+        settings = {
+            "workers": None if args.url else args.workers,
+            "env": dict(args.env),
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "mix": args.mix,
+        }
+        json.dump({"settings": settings, "report": report}, args.json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""
+Password hashing, both the raw Argon2 cost and the full path through the
+hashing executor (queueing, process hop, result marshalling).
+"""
+
+import pytest
+
+from fast_zero.hashing import check_password, hash_password
+from fast_zero.security import (
+    argon2_params,
+    get_password_hash,
+    verify_password,
+)
+
+PASSWORD = "benchmark"
+
+
+@pytest.fixture(scope="module")
+def hashed():
+    return hash_password(PASSWORD, argon2_params)
+
+
+def test_hash_password_in_process(benchmark):
+    benchmark(hash_password, PASSWORD, argon2_params)
+
+
+def test_check_password_in_process(benchmark, hashed):
+    benchmark(check_password, PASSWORD, hashed, argon2_params)
+
+
+def test_get_password_hash(benchmark, runner):
+    benchmark(lambda: runner.run(get_password_hash(PASSWORD)))
+
+
+def test_verify_password(benchmark, runner, hashed):
+    benchmark(lambda: runner.run(verify_password(PASSWORD, hashed)))
@@ -0,0 +1,50 @@
+"""
+Router endpoints against the seeded database, one benchmark per query
+shape. Each round is a full request through the app, so the numbers
+include routing and serialization on top of the query itself.
+"""
+
+from http import HTTPStatus
+
+import pytest
+
+READS = {
+    "users_page": "/users/?limit=100",
+    "users_cursor": "/users/?limit=100&cursor=eyJpZCI6NTAwfQ",
+    "user_by_id": "/users/500",
+    "todos_page": "/todos/?limit=100",
+    "todos_cursor": "/todos/?limit=20&cursor=eyJpZCI6NTB9",
+    "todos_by_state": "/todos/?state=done&limit=20",
+    "todos_title_contains": "/todos/?title=todo 1&limit=20",
+    "todos_search": "/todos/?q=todo&limit=20",
+    "todos_fields": "/todos/?fields=title,state&limit=100",
+    "todos_export": "/todos/export?format=ndjson",
+}
+
+
+@pytest.mark.parametrize("url", READS.values(), ids=READS.keys())
+def test_read(benchmark, client, auth_headers, url):
+    def request():
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == HTTPStatus.OK
+        return response
+
+    benchmark(request)
+
+
+def test_patch_todo(benchmark, client, auth_headers):
+    todo = client.post(
+        "/todos/",
+        json={"title": "patched", "description": "patched", "state": "todo"},
+        headers=auth_headers,
+    ).json()
+
+    def request():
+        response = client.patch(
+            f"/todos/{todo['id']}",
+            json={"state": "doing"},
+            headers=auth_headers,
+        )
+        assert response.status_code == HTTPStatus.OK
+
+    benchmark(request)
@@ -0,0 +1,57 @@
+"""Pydantic validation cost of request and response schemas by size."""
+
+import pytest
+from pydantic import TypeAdapter
+
+from fast_zero.schemas import TodoListSchema, TodoSchema
+
+SIZES = [1, 100, 10_000]
+todo_list_adapter = TypeAdapter(list[TodoSchema])
+
+
+def make_payload(size):
+    return [
+        {
+            "title": f"todo {todo_id}",
+            "description": "description " * 10,
+            "state": "todo",
+        }
+        for todo_id in range(size)
+    ]
+
+
+def make_listing(size):
+    return {
+        "todos": [
+            {
+                **todo,
+                "id": todo_id,
+                "created_at": "2024-07-14T12:00:00",
+                "updated_at": "2024-07-14T12:30:00.123456",
+            }
+            for todo_id, todo in enumerate(make_payload(size), 1)
+        ],
+        "next_cursor": None,
+    }
+
+
+def per_item(benchmark, size):
+    # No stats with --benchmark-disable, where each test runs once.
+    if benchmark.stats:
+        benchmark.extra_info["per_item_us"] = (
+            benchmark.stats.stats.mean / size * 1e6
+        )
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_validate_todo_schema(benchmark, size):
+    payload = make_payload(size)
+    benchmark(todo_list_adapter.validate_python, payload)
+    per_item(benchmark, size)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_validate_todo_list_schema(benchmark, size):
+    listing = make_listing(size)
+    benchmark(TodoListSchema.model_validate, listing)
+    per_item(benchmark, size)
@@ -0,0 +1,60 @@
+"""
+Per-item cost of rendering todo listings.
+
+``response_model`` reproduces what FastAPI does for a ``TodoListSchema``
+endpoint (validate with ``from_attributes`` then encode), ``fast`` is
+``serialization.todo_list_response``. Compare with::
+
+    pytest benchmarks/test_serialization.py --benchmark-group-by=param:size
+"""
+
+from datetime import datetime
+
+import pytest
+from fastapi.responses import JSONResponse
+
+from fast_zero.models import Todo, TodoState
+from fast_zero.schemas import TodoListSchema
+from fast_zero.serialization import todo_list_response
+
+
+def make_todos(size):
+    now = datetime.now()
+    todos = []
+    for todo_id in range(1, size + 1):
+        todo = Todo(
+            title=f"todo {todo_id}",
+            description="description " * 10,
+            state=TodoState.todo,
+            user_id=1,
+        )
+        todo.id = todo_id
+        todo.created_at = todo.updated_at = now
+        todos.append(todo)
+    return todos
+
+
+def render_response_model(todos):
+    validated = TodoListSchema.model_validate(
+        {"todos": todos}, from_attributes=True
+    )
+    return JSONResponse(validated.model_dump(mode="json")).body
+
+
+def render_fast(todos):
+    return todo_list_response(todos).body
+
+
+@pytest.mark.parametrize("size", [1, 100, 10_000])
+@pytest.mark.parametrize(
+    "render",
+    [render_response_model, render_fast],
+    ids=["response_model", "fast"],
+)
+def test_todo_list_serialization(benchmark, render, size):
+    todos = make_todos(size)
+    benchmark(render, todos)
+    if benchmark.stats:
+        benchmark.extra_info["per_item_us"] = (
+            benchmark.stats.stats.mean / size * 1e6
+        )
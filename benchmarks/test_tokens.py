@@ -0,0 +1,41 @@
+"""
+Token handling on every authenticated request: minting, decoding, and
+the two auth dependencies with warm caches (the steady state).
+"""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fast_zero.security import (
+    create_access_token,
+    get_current_principal,
+    get_current_user,
+    token_claims,
+)
+
+
+@pytest.fixture(scope="module")
+def token(bench_user):
+    return create_access_token(data=token_claims(bench_user))
+
+
+@pytest.fixture
+def session(engine, runner):
+    session = AsyncSession(engine, expire_on_commit=False)
+    yield session
+    runner.run(session.close())
+
+
+def test_create_access_token(benchmark, bench_user):
+    claims = token_claims(bench_user)
+    benchmark(create_access_token, claims)
+
+
+def test_get_current_user_warm(benchmark, runner, session, token):
+    runner.run(get_current_user(session, token))
+    benchmark(lambda: runner.run(get_current_user(session, token)))
+
+
+def test_get_current_principal_warm(benchmark, runner, session, token):
+    runner.run(get_current_principal(session, token))
+    benchmark(lambda: runner.run(get_current_principal(session, token)))
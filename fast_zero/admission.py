@@ -0,0 +1,157 @@
+"""
+Admission control.
+
+Requests are sorted into classes: ``auth`` for the routes that run
+Argon2, ``read`` for the other safe methods and ``write`` for the rest.
+Each class has its own cap on requests in flight and all of them share
+a global cap. A request over a cap waits up to ``queue_seconds`` for a
+slot and is then shed with ``503``, so an overloaded database turns into
+fast rejections instead of a pile of requests that all time out. When a
+slot frees up, waiting reads are admitted before writes and writes
+before auth, the cheapest work first.
+"""
+
+import asyncio
+import itertools
+from bisect import insort
+from dataclasses import dataclass
+from http import HTTPStatus
+
+from starlette.responses import JSONResponse
+
+from fast_zero.settings import Settings
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Never shed: scrapes are how overload gets noticed.
+EXEMPT_PATHS = frozenset({"/metrics"})
+
+
+@dataclass(frozen=True)
+class RouteClass:
+    name: str
+    limit: int
+    # Lower is admitted first.
+    priority: int
+
+
+def classify(scope):
+    """Name of the class of an HTTP request, or None if exempt."""
+    path, method = scope["path"], scope["method"]
+    if path in EXEMPT_PATHS:
+        return None
+    if (method == "POST" and path in {"/auth/token", "/users/"}) or (
+        method == "PUT" and path.startswith("/users/")
+    ):
+        return "auth"
+    return "read" if method in READ_METHODS else "write"
+
+
+class AdmissionController:
+    """
+    Per-class and global concurrency caps with a short priority queue.
+
+    Only used from the event loop, so the counters need no lock.
+    """
+
+    def __init__(
+        self,
+        classes: list[RouteClass],
+        max_in_flight: int,
+        queue_seconds: float = 0.5,
+    ):
+        self.classes = {
+            route_class.name: route_class for route_class in classes
+        }
+        self.max_in_flight = max_in_flight
+        self.queue_seconds = queue_seconds
+        self.in_flight = dict.fromkeys(self.classes, 0)
+        self.queued = dict.fromkeys(self.classes, 0)
+        self.shed = dict.fromkeys(self.classes, 0)
+        self._waiters = []
+        self._sequence = itertools.count()
+
+    @property
+    def total_in_flight(self):
+        return sum(self.in_flight.values())
+
+    def _has_room(self, name):
+        return (
+            self.in_flight[name] < self.classes[name].limit
+            and self.total_in_flight < self.max_in_flight
+        )
+
+    async def acquire(self, name: str):
+        """Wait for a slot in class ``name``; False if shed instead."""
+        # First come, first served within a class.
+        if not self.queued[name] and self._has_room(name):
+            self.in_flight[name] += 1
+            return True
+
+        waiter = asyncio.get_running_loop().create_future()
+        priority = self.classes[name].priority
+        entry = (priority, next(self._sequence), name, waiter)
+        insort(self._waiters, entry)
+        self.queued[name] += 1
+        try:
+            await asyncio.wait([waiter], timeout=self.queue_seconds)
+        except BaseException:
+            if waiter.done():
+                self.release(name)
+            raise
+        finally:
+            self._waiters.remove(entry)
+            self.queued[name] -= 1
+            waiter.cancel()
+
+        if not waiter.cancelled():
+            return True
+        self.shed[name] += 1
+        return False
+
+    def release(self, name: str):
+        """Free a slot of class ``name`` and hand out what fits."""
+        self.in_flight[name] -= 1
+        for _, _, waiting, waiter in self._waiters:
+            if self.total_in_flight >= self.max_in_flight:
+                break
+            if not waiter.done() and self._has_room(waiting):
+                self.in_flight[waiting] += 1
+                waiter.set_result(None)
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        name = classify(scope) if scope["type"] == "http" else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.controller.acquire(name):
+            response = JSONResponse(
+                {"detail": "Server is busy, try again later"},
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
+
+
+settings = Settings()
+
+admission_controller = AdmissionController(
+    [
+        RouteClass("read", settings.ADMISSION_READ_LIMIT, priority=0),
+        RouteClass("write", settings.ADMISSION_WRITE_LIMIT, priority=1),
+        RouteClass("auth", settings.ADMISSION_AUTH_LIMIT, priority=2),
+    ],
+    max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+    queue_seconds=settings.ADMISSION_QUEUE_SECONDS,
+)
@@ -1,14 +1,35 @@
+from contextlib import asynccontextmanager
 from http import HTTPStatus
 
 from fastapi import FastAPI
 
-from fast_zero.routers import auth, todos, users
+from fast_zero.admission import AdmissionMiddleware, admission_controller
+from fast_zero.instrumentation import (
+    InstrumentedRoute,
+    RequestInstrumentationMiddleware,
+)
+from fast_zero.metrics import MetricsMiddleware
+from fast_zero.routers import admin, auth, metrics, todos, users
 from fast_zero.schemas import Message
+from fast_zero.security import hashing_executor
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    hashing_executor.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+app.router.route_class = InstrumentedRoute
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+app.add_middleware(RequestInstrumentationMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(todos.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
 
 
 @app.get("/", status_code=HTTPStatus.OK, response_model=Message)
@@ -0,0 +1,169 @@
+import argparse
+import asyncio
+import io
+import sys
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fast_zero.database import engine
+from fast_zero.hashing import DEFAULT_PARAMS, calibrate, recommend
+from fast_zero.http_cache import bump_todos_version
+from fast_zero.importer import (
+    DECODE_ERRORS,
+    IMPORT_BATCH_SIZE,
+    import_todos,
+)
+from fast_zero.models import User
+
+# Percentiles need at least two timings.
+MIN_SAMPLES = 2
+
+
+async def _file_lines(file):
+    for line in file:
+        yield line
+
+
+async def _import_todos(args):
+    fmt = args.format
+    if fmt is None:
+        fmt = "csv" if args.file.name.endswith(".csv") else "ndjson"
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        user_id = await session.scalar(
+            select(User.id).where(User.email == args.user)
+        )
+        if user_id is None:
+            print(f"User not found: {args.user}", file=sys.stderr)
+            return 1
+        report = await import_todos(
+            session, user_id, _file_lines(args.file), fmt, args.batch_size
+        )
+        await session.execute(bump_todos_version(user_id))
+        await session.commit()
+    await engine.dispose()
+
+    print(
+        f"Imported {report.imported} todos in "
+        f"{report.elapsed_seconds:.2f}s "
+        f"({report.rows_per_second:.0f} rows/s), {report.failed} rejected"
+    )
+    for error in report.errors:
+        print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+    if report.failed > len(report.errors):
+        hidden = report.failed - len(report.errors)
+        print(f"... {hidden} more errors not shown", file=sys.stderr)
+    return 1 if report.failed else 0
+
+
+async def _calibrate_argon2(args):
+    target_seconds = args.target_ms / 1000
+    results = calibrate(
+        target_seconds,
+        parallelism=args.parallelism,
+        samples=args.samples,
+    )
+    print("time_cost memory_cost parallelism   p99_ms")
+    for params, p99 in results:
+        print(
+            f"{params.time_cost:>9} {params.memory_cost:>11} "
+            f"{params.parallelism:>11} {p99 * 1000:>8.1f}"
+        )
+
+    params = recommend(results, target_seconds)
+    if params is None:
+        print(
+            f"No candidate hashes within {args.target_ms:g} ms at p99.",
+            file=sys.stderr,
+        )
+        return 1
+    print(f"\nRecommended for a p99 of {args.target_ms:g} ms:")
+    print(f"ARGON2_TIME_COST={params.time_cost}")
+    print(f"ARGON2_MEMORY_COST={params.memory_cost}")
+    print(f"ARGON2_PARALLELISM={params.parallelism}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="fast_zero")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser(
+        "import-todos", help="Bulk load todos for a user with COPY."
+    )
+    import_parser.add_argument(
+        "file",
+        type=_import_file,
+        help="NDJSON or CSV file, or - for stdin.",
+    )
+    import_parser.add_argument(
+        "--user", required=True, help="Email of the owner of the todos."
+    )
+    import_parser.add_argument(
+        "--format",
+        choices=["ndjson", "csv"],
+        help="Input format. Defaults to csv for *.csv files, else ndjson.",
+    )
+    import_parser.add_argument(
+        "--batch-size", type=int, default=IMPORT_BATCH_SIZE
+    )
+    import_parser.set_defaults(handler=_import_todos)
+
+    calibrate_parser = commands.add_parser(
+        "calibrate-argon2",
+        help="Benchmark Argon2 costs on this host and recommend settings.",
+    )
+    calibrate_parser.add_argument(
+        "--target-ms",
+        type=float,
+        default=250.0,
+        help="Latency budget for one hash, at p99 (default: 250).",
+    )
+    calibrate_parser.add_argument(
+        "--parallelism", type=int, default=DEFAULT_PARAMS.parallelism
+    )
+    calibrate_parser.add_argument(
+        "--samples",
+        type=_at_least_two,
+        default=10,
+        help="Hashes timed per candidate (default: 10).",
+    )
+    calibrate_parser.set_defaults(handler=_calibrate_argon2)
+    return parser
+
+
+def _import_file(path):
+    # Decoded like uploads to /todos/import. newline="" keeps line breaks
+    # inside quoted CSV fields as they are in the file.
+    options = {
+        "encoding": "utf-8-sig",
+        "errors": DECODE_ERRORS,
+        "newline": "",
+    }
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, **options)
+    try:
+        return open(path, **options)
+    except OSError as exc:
+        raise argparse.ArgumentTypeError(
+            f"can't open '{path}': {exc}"
+        ) from None
+
+
+def _at_least_two(value):
+    number = int(value)
+    if number < MIN_SAMPLES:
+        raise argparse.ArgumentTypeError(
+            f"needs at least {MIN_SAMPLES} samples"
+        )
+    return number
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
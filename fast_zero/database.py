@@ -1,11 +1,203 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+import itertools
+import time
 
+from fastapi import Depends, Request
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from fast_zero.cache import TTLCache
+from fast_zero.metrics import Histogram, metrics
 from fast_zero.settings import Settings
 
-engine = create_engine(Settings().DATABASE_URL)
 
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout takes."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_seconds = Histogram()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.checkout_seconds.observe(time.perf_counter() - start)
+
+    def recreate(self):
+        # Engine.dispose() swaps in a new pool; keep the series going.
+        pool = super().recreate()
+        pool.checkout_seconds = self.checkout_seconds
+        return pool
+
+
+def make_engine(
+    settings: Settings, name: str = "primary", connect_timeout=None
+):
+    """
+    Engine for ``settings.DATABASE_URL``. With a queue pool, checkout
+    times are exported under ``name``.
+    """
+    options = {"pool_pre_ping": settings.DATABASE_POOL_PRE_PING}
+    if settings.DATABASE_POOL == "null":
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        )
+    connect_args = {}
+    if settings.DATABASE_PGBOUNCER:
+        # Statements prepared on one server connection would be missing
+        # on the next one PgBouncer hands out.
+        connect_args["prepare_threshold"] = None
+    if connect_timeout is not None:
+        connect_args["connect_timeout"] = connect_timeout
+    if connect_args:
+        options["connect_args"] = connect_args
+    engine = create_async_engine(settings.DATABASE_URL, **options)
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.checkout_seconds = metrics.pool_checkout.setdefault(
+            name, engine.pool.checkout_seconds
+        )
+    return engine
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {
+        "pool": type(pool).__name__,
+        "pre_ping": pool._pre_ping,
+        "recycle": pool._recycle,
+        "checkout_count": 0,
+        "checkout_seconds": 0.0,
+    }
+    if isinstance(pool, TimedQueuePool):
+        stats.update(
+            checkout_count=pool.checkout_seconds.count,
+            checkout_seconds=pool.checkout_seconds.sum,
+        )
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    return stats
+
+
+class ReplicaSet:
+    """
+    Round-robin over read replica engines. A replica that fails to
+    connect is skipped for ``cooldown`` seconds.
+    """
+
+    def __init__(self, engines, cooldown: float = 30.0, timer=None):
+        self.engines = list(engines)
+        self.cooldown = cooldown
+        self._timer = timer or time.monotonic
+        self._turn = itertools.count()
+        self._down_until = {}
+
+    def __bool__(self):
+        return bool(self.engines)
+
+    def candidates(self):
+        """Healthy replicas, starting with the one whose turn it is."""
+        if not self.engines:
+            return []
+        start = next(self._turn) % len(self.engines)
+        now = self._timer()
+        return [
+            replica
+            for replica in self.engines[start:] + self.engines[:start]
+            if self._down_until.get(replica, 0) <= now
+        ]
+
+    def mark_down(self, replica):
+        self._down_until[replica] = self._timer() + self.cooldown
+
+
+settings = Settings()
+engine = make_engine(settings)
+replicas = ReplicaSet(
+    [
+        # Pre-ping so a dead replica fails at checkout, where we can
+        # still fall back, instead of in the middle of a handler.
+        make_engine(
+            settings.model_copy(
+                update={
+                    "DATABASE_URL": url,
+                    "DATABASE_POOL_PRE_PING": True,
+                    # A saturated replica hands the read on quickly.
+                    "DATABASE_POOL_TIMEOUT": (
+                        settings.DATABASE_REPLICA_POOL_TIMEOUT
+                    ),
+                }
+            ),
+            name=f"replica{number}",
+            # A replica that drops packets must not hold reads up until
+            # the OS gives up on the connection.
+            connect_timeout=settings.DATABASE_REPLICA_CONNECT_TIMEOUT,
+        )
+        for number, url in enumerate(settings.DATABASE_REPLICA_URLS)
+    ],
+    cooldown=settings.DATABASE_REPLICA_COOLDOWN_SECONDS,
+)
+recent_writers = TTLCache(
+    maxsize=10_000, ttl=settings.DATABASE_READ_YOUR_WRITES_SECONDS
+)
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def _client_key(request: Request):
+    if authorization := request.headers.get("authorization"):
+        return authorization
+    return request.client.host if request.client else None
+
+
+async def get_session(request: Request):
+    if request.method not in SAFE_METHODS:
+        key = _client_key(request)
+        if key is not None:
+            recent_writers.set(key, True)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def get_read_session(
+    request: Request, session: AsyncSession = Depends(get_session)
+):
+    """
+    Session for read-only handlers. Uses a healthy replica, unless the
+    client wrote recently (read-your-writes) or none is available, in
+    which case it is the primary ``session``.
+    """
+    key = _client_key(request)
+    if not replicas or (key is not None and recent_writers.get(key)):
+        yield session
+        return
 
-def get_session():
-    with Session(engine) as s:
-        yield s
+    for replica in replicas.candidates():
+        async with AsyncSession(
+            replica, expire_on_commit=False
+        ) as replica_session:
+            try:
+                await replica_session.connection()
+            except DBAPIError:
+                replicas.mark_down(replica)
+                continue
+            except PoolTimeoutError:
+                # Busy, not broken: try the next one but keep it in turn.
+                continue
+            yield replica_session
+            return
+    yield session
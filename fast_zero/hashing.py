@@ -0,0 +1,213 @@
+import asyncio
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from functools import lru_cache
+
+import argon2
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+
+@dataclass(frozen=True)
+class Argon2Params:
+    time_cost: int = argon2.DEFAULT_TIME_COST
+    memory_cost: int = argon2.DEFAULT_MEMORY_COST  # KiB
+    parallelism: int = argon2.DEFAULT_PARALLELISM
+
+
+DEFAULT_PARAMS = Argon2Params()
+
+
+@lru_cache
+def password_context(params: Argon2Params = DEFAULT_PARAMS):
+    return PasswordHash(
+        (
+            Argon2Hasher(
+                time_cost=params.time_cost,
+                memory_cost=params.memory_cost,
+                parallelism=params.parallelism,
+            ),
+        )
+    )
+
+
+# The functions below run in the hashing workers, so the parameters travel
+# with every job instead of being read from settings in each process.
+def hash_password(password: str, params: Argon2Params = DEFAULT_PARAMS):
+    return password_context(params).hash(password)
+
+
+def check_password(
+    plain_password: str,
+    hashed_password: str,
+    params: Argon2Params = DEFAULT_PARAMS,
+):
+    return password_context(params).verify(plain_password, hashed_password)
+
+
+def check_and_update_password(
+    plain_password: str,
+    hashed_password: str,
+    params: Argon2Params = DEFAULT_PARAMS,
+):
+    """
+    Like ``check_password``, plus a new hash when ``hashed_password`` was
+    made with other parameters than ``params`` (else ``None``).
+    """
+    return password_context(params).verify_and_update(
+        plain_password, hashed_password
+    )
+
+
+def calibrate(
+    target_seconds: float,
+    memory_costs=(19_456, 47_104, 65_536, 131_072, 262_144),
+    time_costs=(1, 2, 3, 4, 6, 8),
+    parallelism: int = DEFAULT_PARAMS.parallelism,
+    samples: int = 10,
+):
+    """
+    Time ``hash_password`` for each candidate on this host and return
+    ``(params, p99_seconds)`` in the order they were tried. A row
+    stops at the first time cost over ``target_seconds``, and the scan
+    stops at the first memory cost whose cheapest candidate is over.
+    """
+    results = []
+    for memory_cost in memory_costs:
+        for time_cost in time_costs:
+            params = Argon2Params(time_cost, memory_cost, parallelism)
+            durations = []
+            for _ in range(samples):
+                start = time.perf_counter()
+                hash_password("calibration password", params)
+                durations.append(time.perf_counter() - start)
+            cuts = statistics.quantiles(durations, n=100, method="inclusive")
+            p99 = cuts[98]
+            results.append((params, p99))
+            if p99 > target_seconds:
+                break
+        if time_cost == time_costs[0] and p99 > target_seconds:
+            break
+    return results
+
+
+def recommend(results, target_seconds: float):
+    """Strongest calibrated parameters within ``target_seconds``."""
+    within = [params for params, p99 in results if p99 <= target_seconds]
+    if not within:
+        return None
+    return max(
+        within, key=lambda p: (p.memory_cost * p.time_cost, p.memory_cost)
+    )
+
+
+class HashingUnavailable(Exception):
+    """
+    The hashing executor is saturated, took too long to answer or lost
+    a worker.
+    """
+
+
+class HashingExecutor:
+    """
+    Run password hashing off the event loop on a bounded pool.
+
+    At most ``workers + queue_size`` jobs are accepted at a time; extra
+    jobs are rejected right away and jobs that don't finish within
+    ``timeout`` seconds are abandoned. Both cases raise
+    ``HashingUnavailable``, as do the jobs of a process pool whose worker
+    died (e.g. killed for memory); the next job starts a fresh pool.
+    """
+
+    def __init__(
+        self,
+        kind: str = "process",
+        workers: int | None = None,
+        queue_size: int = 64,
+        timeout: float = 5.0,
+    ):
+        if kind not in {"process", "thread"}:
+            raise ValueError(f"Unknown hashing executor kind: {kind}")
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = self.workers + queue_size
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self):
+        return self._pending
+
+    @property
+    def queue_depth(self):
+        return max(self._pending - self.workers, 0)
+
+    def _get_executor(self):
+        # Created on first use so importing this module never spawns
+        # worker processes.
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="hashing",
+                )
+        return self._executor
+
+    def _discard(self, executor):
+        # A process pool is unusable for good once a worker dies.
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HashingUnavailable("Hashing queue is full")
+            self._pending += 1
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool as exc:
+            self._release()
+            self._discard(executor)
+            raise HashingUnavailable("Hashing worker died") from exc
+        except BaseException:
+            self._release()
+            raise
+        # The slot is freed when the job really ends, not when we stop
+        # waiting for it, so abandoned jobs still count against the bound.
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), self.timeout
+            )
+        except asyncio.TimeoutError:
+            raise HashingUnavailable("Hashing timed out")
+        except BrokenProcessPool as exc:
+            self._discard(executor)
+            raise HashingUnavailable("Hashing worker died") from exc
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,57 @@
+import hashlib
+from http import HTTPStatus
+
+from fastapi import Request, Response
+from sqlalchemy import update
+
+from fast_zero.models import User
+
+
+def make_etag(*parts):
+    """Strong ETag derived from the given version components."""
+    digest = hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(request: Request, etag: str):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison function (RFC 9110, 13.1.2).
+    candidates = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag in candidates
+
+
+def not_modified(etag: str, cache_control: str):
+    return Response(
+        status_code=HTTPStatus.NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def bump_todos_version(user_id: int):
+    """
+    Statement marking the todos of ``user_id`` as changed. Run it in the
+    same transaction as every write to ``todos``.
+    """
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            todos_version=User.todos_version + 1,
+            # Keep the user's own representation (and ETag) untouched.
+            updated_at=User.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def with_todos_version_bump(statement, user_id: int):
+    """
+    Attach the version bump to ``statement`` as a data-modifying CTE, so
+    the write and the bump travel in a single round trip.
+    """
+    bump = bump_todos_version(user_id).cte("bump_todos_version")
+    return statement.add_cte(bump)
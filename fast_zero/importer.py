@@ -0,0 +1,217 @@
+import codecs
+import csv
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fast_zero.schemas import TodoSchema
+
+IMPORT_BATCH_SIZE = 5_000
+MAX_REPORTED_ERRORS = 1_000
+COPY_TODOS = "COPY todos (title, description, state, user_id) FROM STDIN"
+# Decoding keeps bytes that are not UTF-8 as lone surrogates, so they
+# reach the parsers and are reported with their line.
+DECODE_ERRORS = "surrogateescape"
+INVALID_UTF8 = "Invalid UTF-8"
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.imported / self.elapsed_seconds
+
+    def add_error(self, line: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+
+async def iter_lines(chunks):
+    """
+    Split an async stream of byte chunks into decoded text lines, keeping
+    their line endings (CSV fields may contain newlines). A leading
+    byte-order mark is dropped.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(DECODE_ERRORS)
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield f"{line}\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _is_utf8(text: str):
+    try:
+        text.encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+async def _ndjson_records(lines):
+    line_number = 0
+    async for raw_line in lines:
+        line_number += 1
+        line = raw_line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        if not _is_utf8(line):
+            yield line_number, None, INVALID_UTF8
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, str(exc)
+            continue
+        if not isinstance(data, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, data, None
+
+
+class _LineFeed:
+    """
+    The lines received so far, as the iterator behind a ``csv.reader``.
+    Running dry only pauses the reader; later lines are appended and it
+    carries on.
+    """
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+def _read_rows(reader):
+    while True:
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            yield reader.line_num, exc
+            continue
+        yield reader.line_num, values
+
+
+async def _csv_rows(lines):
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    quotes = 0
+    async for line in lines:
+        feed.lines.append(line)
+        # While the count of quotes is odd a quoted field is still open
+        # and the line break belongs to it: wait for the rest.
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        quotes = 0
+        for row in _read_rows(reader):
+            yield row
+    # Whatever is left is an unterminated quoted field.
+    for row in _read_rows(reader):
+        yield row
+
+
+async def _csv_records(lines):
+    header = None
+    async for line_number, values in _csv_rows(lines):
+        if isinstance(values, csv.Error):
+            yield line_number, None, str(values)
+        elif not values:
+            continue
+        elif header is None:
+            header = values
+        elif not all(map(_is_utf8, values)):
+            yield line_number, None, INVALID_UTF8
+        elif len(values) != len(header):
+            error = f"Expected {len(header)} columns, got {len(values)}"
+            yield line_number, None, error
+        else:
+            yield line_number, dict(zip(header, values)), None
+
+
+async def _copy_rows(session: AsyncSession, rows: list[tuple]):
+    # COPY runs on the session's own connection, inside its transaction.
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    async with raw_connection.driver_connection.cursor() as cursor:
+        async with cursor.copy(COPY_TODOS) as copy:
+            for row in rows:
+                await copy.write_row(row)
+
+
+async def import_todos(
+    session: AsyncSession,
+    user_id: int,
+    lines,
+    fmt: str = "ndjson",
+    batch_size: int = IMPORT_BATCH_SIZE,
+):
+    """
+    Validate ``lines`` (NDJSON objects or CSV with a header row) against
+    ``TodoSchema`` and load the valid ones into ``todos`` with COPY, in
+    batches of ``batch_size``. Invalid lines are reported, not loaded.
+
+    The caller owns the transaction and must commit.
+    """
+    records = _csv_records(lines) if fmt == "csv" else _ndjson_records(lines)
+    report = ImportReport()
+    batch = []
+    start = time.perf_counter()
+
+    async for line_number, data, error in records:
+        if error is not None:
+            report.add_error(line_number, error)
+            continue
+        try:
+            todo = TodoSchema.model_validate(data)
+        except ValidationError as exc:
+            report.add_error(line_number, _describe(exc))
+            continue
+        if "\x00" in todo.title or "\x00" in todo.description:
+            # Postgres text cannot hold NUL, COPY would fail the import.
+            report.add_error(line_number, "NUL characters are not allowed")
+            continue
+
+        batch.append((todo.title, todo.description, todo.state.value, user_id))
+        if len(batch) >= batch_size:
+            await _copy_rows(session, batch)
+            report.imported += len(batch)
+            batch.clear()
+
+    if batch:
+        await _copy_rows(session, batch)
+        report.imported += len(batch)
+
+    report.elapsed_seconds = time.perf_counter() - start
+    return report
+
+
+def _describe(exc: ValidationError):
+    return "; ".join(
+        f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+        for error in exc.errors()
+    )
@@ -0,0 +1,236 @@
+"""
+Per-request timing.
+
+``RequestInstrumentationMiddleware`` opens a ``RequestStats`` for every
+HTTP request and publishes it through a context variable. The engine
+hooks below, the password hashing helpers and ``InstrumentedRoute`` add
+their share to it; the middleware reports the totals in a
+``Server-Timing`` header and a log line on ``fast_zero.requests``.
+"""
+
+import functools
+import inspect
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from fast_zero.settings import Settings
+
+settings = Settings()
+logger = logging.getLogger("fast_zero.requests")
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    sql_seconds: float = 0.0
+    hash_seconds: float = 0.0
+    serialize_seconds: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    endpoint_returned_at: float | None = field(default=None, repr=False)
+
+    def server_timing(self, total_seconds: float):
+        sql_ms = self.sql_seconds * 1000
+        return ", ".join(
+            [
+                f'db;dur={sql_ms:.2f};desc="{self.queries} queries"',
+                f"hash;dur={self.hash_seconds * 1000:.2f}",
+                f"serialize;dur={self.serialize_seconds * 1000:.2f}",
+                f"total;dur={total_seconds * 1000:.2f}",
+            ]
+        )
+
+
+_current_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def current_stats():
+    """Stats of the request being served, or ``None`` outside of one."""
+    return _current_stats.get()
+
+
+@contextmanager
+def timed(attribute: str):
+    """Add the wall time of the block to ``attribute`` of the stats."""
+    stats = _current_stats.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        setattr(stats, attribute, getattr(stats, attribute) + elapsed)
+
+
+def _mark_endpoint_return():
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.endpoint_returned_at = time.perf_counter()
+
+
+def _marking_return(endpoint):
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            response = await endpoint(*args, **kwargs)
+            _mark_endpoint_return()
+            return response
+
+        return wrapper
+    if inspect.isasyncgenfunction(endpoint) or inspect.isgeneratorfunction(
+        endpoint
+    ):
+        # Streamed: there is no single point where the endpoint is done.
+        return endpoint
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        # Sync endpoints run in a thread with a copy of the context; the
+        # stats object is shared, so the mark still lands.
+        response = endpoint(*args, **kwargs)
+        _mark_endpoint_return()
+        return response
+
+    return wrapper
+
+
+class InstrumentedRoute(APIRoute):
+    """
+    Route that counts everything between the endpoint returning and the
+    response being ready (response model validation and JSON encoding)
+    as ``serialize_seconds``. Endpoints that build their own response
+    (``FastJSONResponse``) are covered too: its rendering happens before
+    the endpoint returns and is timed there.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _marking_return(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            stats = _current_stats.get()
+            if stats is not None and stats.endpoint_returned_at is not None:
+                stats.serialize_seconds += (
+                    time.perf_counter() - stats.endpoint_returned_at
+                )
+                stats.endpoint_returned_at = None
+            return response
+
+        return timed_handler
+
+
+# SQLAlchemy runs the async driver calls in a greenlet that shares the
+# context of the calling task, so the hooks see the request's stats. The
+# start time lives on the execution context, which is dropped with the
+# statement whether it succeeds or raises.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, params, context, *args):
+    if _current_stats.get() is not None and context is not None:
+        context.query_start = time.perf_counter()
+
+
+def _record_query(context, statement):
+    stats = _current_stats.get()
+    start = getattr(context, "query_start", None)
+    if stats is None or start is None:
+        return
+    stats.queries += 1
+    stats.sql_seconds += time.perf_counter() - start
+    stats.statements[statement] += 1
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, params, context, *args):
+    _record_query(context, statement)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # Failed statements (e.g. an IntegrityError turned into a 409) still
+    # ran on the database.
+    _record_query(
+        exception_context.execution_context, exception_context.statement
+    )
+
+
+class RequestInstrumentationMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        status_code = None
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                timing = stats.server_timing(time.perf_counter() - start)
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", timing.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            _log_request(
+                scope, status_code, stats, time.perf_counter() - start
+            )
+
+
+def _log_request(scope, status_code, stats: RequestStats, total_seconds):
+    route = scope.get("route")
+    record = {
+        "method": scope["method"],
+        "path": scope["path"],
+        "route": getattr(route, "path", None),
+        "status": status_code,
+        "duration_ms": round(total_seconds * 1000, 2),
+        "queries": stats.queries,
+        "sql_ms": round(stats.sql_seconds * 1000, 2),
+        "hash_ms": round(stats.hash_seconds * 1000, 2),
+        "serialize_ms": round(stats.serialize_seconds * 1000, 2),
+    }
+    logger.info(
+        " ".join(f"{key}={value}" for key, value in record.items()),
+        extra={"request": record},
+    )
+
+    budget = settings.QUERY_BUDGET
+    if budget is not None and stats.queries > budget:
+        statement, count = stats.statements.most_common(1)[0]
+        logger.warning(
+            "Query budget exceeded: %s %s ran %d queries (budget %d); "
+            "most repeated, %d times: %s",
+            record["method"],
+            record["path"],
+            stats.queries,
+            budget,
+            count,
+            " ".join(statement.split()),
+            extra={"request": record},
+        )
@@ -0,0 +1,224 @@
+"""
+Prometheus metrics in the text exposition format.
+
+Everything here is updated from the event loop thread, so the counters
+are plain ints mutated without locks. Per-route series are created the
+first time a route is seen; after that a request only bumps a handful
+of numbers.
+"""
+
+import time
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    __slots__ = ("buckets", "count", "counts", "sum")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, labels: str = ""):
+        prefix = f"{labels}," if labels else ""
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}'
+        suffix = f"{{{labels}}}" if labels else ""
+        yield f"{name}_sum{suffix} {self.sum}"
+        yield f"{name}_count{suffix} {self.count}"
+
+
+class Metrics:
+    def __init__(self):
+        self.in_flight = 0
+        self.latency = {}
+        self.responses = {}
+        # Engine name -> checkout time histogram.
+        self.pool_checkout = {}
+
+    def observe_request(self, method, route, status, seconds):
+        key = (method, route)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram()
+        histogram.observe(seconds)
+        key = (method, route, status)
+        self.responses[key] = self.responses.get(key, 0) + 1
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.in_flight -= 1
+            # Label by route template, not path, to bound cardinality.
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            metrics.observe_request(
+                scope["method"],
+                route,
+                status_code,
+                time.perf_counter() - start,
+            )
+
+
+def render(pool=None, hashing_executor=None, auth_cache=None, admission=None):
+    """Render the registry plus point-in-time gauges of the given parts."""
+    lines = [
+        "# HELP fast_zero_http_requests_in_flight Requests being served.",
+        "# TYPE fast_zero_http_requests_in_flight gauge",
+        f"fast_zero_http_requests_in_flight {metrics.in_flight}",
+        "# HELP fast_zero_http_request_duration_seconds Request latency.",
+        "# TYPE fast_zero_http_request_duration_seconds histogram",
+    ]
+    for (method, route), histogram in sorted(metrics.latency.items()):
+        lines.extend(
+            histogram.samples(
+                "fast_zero_http_request_duration_seconds",
+                f'method="{method}",route="{route}"',
+            )
+        )
+    lines += [
+        "# HELP fast_zero_http_responses_total Responses by status code.",
+        "# TYPE fast_zero_http_responses_total counter",
+    ]
+    for (method, route, status), count in sorted(metrics.responses.items()):
+        lines.append(
+            "fast_zero_http_responses_total"
+            f'{{method="{method}",route="{route}",status="{status}"}} {count}'
+        )
+
+    if pool is not None and hasattr(pool, "checkedout"):
+        lines += _gauge("db_pool_size", "Configured pool size.", pool.size())
+        lines += _gauge(
+            "db_pool_checked_out",
+            "Connections in use.",
+            pool.checkedout(),
+        )
+        lines += _gauge(
+            "db_pool_overflow",
+            "Connections open beyond the pool size.",
+            max(pool.overflow(), 0),
+        )
+    lines += [
+        "# HELP fast_zero_db_pool_checkout_seconds "
+        "Time to get a connection from the pool, opening one if needed.",
+        "# TYPE fast_zero_db_pool_checkout_seconds histogram",
+    ]
+    for name, histogram in sorted(metrics.pool_checkout.items()):
+        lines.extend(
+            histogram.samples(
+                "fast_zero_db_pool_checkout_seconds", f'engine="{name}"'
+            )
+        )
+
+    if hashing_executor is not None:
+        lines += _gauge(
+            "hash_queue_depth",
+            "Password hashing jobs waiting for a worker.",
+            hashing_executor.queue_depth,
+        )
+        lines += _gauge(
+            "hash_pending",
+            "Password hashing jobs accepted and not finished.",
+            hashing_executor.pending,
+        )
+
+    if auth_cache is not None:
+        lookups = auth_cache.hits + auth_cache.misses
+        lines += _counter(
+            "auth_cache_hits_total", "Auth cache hits.", auth_cache.hits
+        )
+        lines += _counter(
+            "auth_cache_misses_total", "Auth cache misses.", auth_cache.misses
+        )
+        lines += _gauge(
+            "auth_cache_hit_ratio",
+            "Auth cache hits over lookups since start.",
+            auth_cache.hits / lookups if lookups else 0.0,
+        )
+        lines += _gauge(
+            "auth_cache_entries", "Cached principals.", len(auth_cache)
+        )
+
+    if admission is not None:
+        lines += _by_class(
+            "admission_in_flight",
+            "Admitted requests being served.",
+            "gauge",
+            admission.in_flight,
+        )
+        lines += _by_class(
+            "admission_queued",
+            "Requests waiting for admission.",
+            "gauge",
+            admission.queued,
+        )
+        lines += _by_class(
+            "admission_shed_total",
+            "Requests rejected with 503 after queueing.",
+            "counter",
+            admission.shed,
+        )
+    return "\n".join(lines) + "\n"
+
+
+def _gauge(name, help_text, value):
+    return _sample(name, help_text, "gauge", value)
+
+
+def _counter(name, help_text, value):
+    return _sample(name, help_text, "counter", value)
+
+
+def _by_class(name, help_text, kind, values):
+    name = f"fast_zero_{name}"
+    return [
+        f"# HELP {name} {help_text}",
+        f"# TYPE {name} {kind}",
+        *(f'{name}{{class="{key}"}} {value}' for key, value in values.items()),
+    ]
+
+
+def _sample(name, help_text, kind, value):
+    name = f"fast_zero_{name}"
+    return [
+        f"# HELP {name} {help_text}",
+        f"# TYPE {name} {kind}",
+        f"{name} {value}",
+    ]
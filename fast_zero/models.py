@@ -1,12 +1,20 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import DDL, Computed, DateTime, ForeignKey, Index, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 from sqlalchemy.sql import func
 
 table_registry = registry()
 
+# Trigram indexes on todos need the pg_trgm operator classes.
+event.listen(
+    table_registry.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+)
+
 
 @table_registry.mapped_as_dataclass
 class User:
@@ -22,6 +30,14 @@ class User:
     updated_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now(), onupdate=func.now()
     )
+    # Embedded in access tokens as ``ver``; bumping it revokes them all.
+    token_version: Mapped[int] = mapped_column(
+        init=False, server_default="0", repr=False
+    )
+    # Bumped on every write to the user's todos; backs the todo list ETag.
+    todos_version: Mapped[int] = mapped_column(
+        init=False, server_default="0", deferred=True, repr=False
+    )
     todos: Mapped[list["Todo"]] = relationship(
         init=False, back_populates="user", cascade="all, delete-orphan"
     )
@@ -38,6 +54,25 @@ class TodoState(str, Enum):
 @table_registry.mapped_as_dataclass
 class Todo:
     __tablename__ = "todos"
+    __table_args__ = (
+        Index("ix_todos_user_id_id", "user_id", "id"),
+        Index("ix_todos_user_id_state_id", "user_id", "state", "id"),
+        Index(
+            "ix_todos_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_todos_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_todos_search_vector", "search_vector", postgresql_using="gin"
+        ),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str]
@@ -51,3 +86,28 @@ class Todo:
     updated_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now(), onupdate=func.now()
     )
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', title), 'A') || "
+            "setweight(to_tsvector('simple', description), 'B')",
+            persisted=True,
+        ),
+        init=False,
+        deferred=True,
+        repr=False,
+    )
+
+
+@table_registry.mapped_as_dataclass
+class RevokedToken:
+    __tablename__ = "revoked_tokens"
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    jti: Mapped[str] = mapped_column(unique=True)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), index=True
+    )
+    revoked_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
@@ -0,0 +1,36 @@
+import base64
+import binascii
+import json
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+
+def encode_cursor(last_id: int):
+    """Opaque cursor pointing right after the row ``last_id``."""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        last_id = None
+    if not isinstance(last_id, int):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail="Invalid cursor"
+        )
+    return last_id
+
+
+def paginate(rows: list, limit: int | None):
+    """
+    Split a page fetched with ``limit + 1`` rows into the page itself and
+    the cursor for the next one (``None`` on the last page).
+    """
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].id)
@@ -0,0 +1,94 @@
+"""
+Token-bucket rate limiting.
+
+A bucket holds up to ``burst`` tokens and refills at ``per_minute``
+tokens a minute; each attempt takes one. Buckets live in a backend:
+``MemoryBackend`` keeps them in process, so every worker limits on its
+own. To share limits across workers, implement ``RateLimitBackend`` on a
+shared store (e.g. a Redis script doing the same arithmetic) and assign
+it to ``RateLimiter.backend`` at startup.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Rate:
+    burst: int
+    per_minute: float
+
+    @property
+    def per_second(self):
+        return self.per_minute / 60
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def acquire(self, key: str, rate: Rate) -> float:
+        """
+        Take a token from the bucket of ``key``. Returns 0 if one was
+        available, else the seconds until there will be one.
+        """
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Buckets in a dict, bounded to ``maxsize`` keys. The least recently
+    used bucket is evicted when full, which at worst forgets a penalty.
+    """
+
+    def __init__(self, maxsize: int = 100_000, timer=None):
+        self.maxsize = maxsize
+        self._timer = timer or time.monotonic
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    async def acquire(self, key: str, rate: Rate) -> float:
+        now = self._timer()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (rate.burst, now))
+            tokens = min(
+                rate.burst, tokens + (now - updated) * rate.per_second
+            )
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                self._buckets.move_to_end(key)
+                while len(self._buckets) > self.maxsize:
+                    self._buckets.popitem(last=False)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+        return (1 - tokens) / rate.per_second
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RateLimiter:
+    """Check a set of named rates, each against its own key."""
+
+    def __init__(self, backend: RateLimitBackend, rates: dict[str, Rate]):
+        self.backend = backend
+        self.rates = rates
+
+    async def acquire(self, **keys: str) -> float:
+        """
+        Take a token from each bucket, e.g. ``acquire(ip=..., email=...)``,
+        stopping at the first one that is empty. Returns 0 when every
+        bucket allowed the attempt, else the seconds to wait.
+        """
+        for name, key in keys.items():
+            retry_after = await self.backend.acquire(
+                f"{name}:{key}", self.rates[name]
+            )
+            if retry_after:
+                return retry_after
+        return 0.0
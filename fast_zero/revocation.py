@@ -0,0 +1,135 @@
+"""
+Access token revocation.
+
+Revoked ``jti`` claims are stored in ``revoked_tokens`` and mirrored in
+every process by a ``RevocationList``: a Bloom filter that answers "not
+revoked" for almost every token without touching the exact set, backed
+by that set for the rare positive. New rows are pulled incrementally
+(by id) at most every ``refresh_interval`` seconds, so other workers
+learn about a logout within that window.
+"""
+
+import hashlib
+import math
+import time
+from datetime import datetime
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fast_zero.models import RevokedToken
+
+# Ids are handed out at insert but become visible at commit, so a slow
+# transaction can commit an id below one already seen. Re-reading a
+# trailing window of ids catches those; adding is idempotent.
+REFRESH_OVERLAP = 1_000
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str):
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class RevocationList:
+    def __init__(
+        self,
+        capacity: int = 100_000,
+        refresh_interval: float = 5.0,
+        timer=None,
+    ):
+        self.capacity = capacity
+        self.refresh_interval = refresh_interval
+        self._timer = timer or time.monotonic
+        self.clear()
+
+    def clear(self):
+        self._bloom = BloomFilter(self.capacity)
+        self._expires_at = {}
+        self._last_id = 0
+        self._next_refresh = float("-inf")
+
+    def __len__(self):
+        return len(self._expires_at)
+
+    def add(self, jti: str, expires_at: datetime):
+        self._bloom.add(jti)
+        self._expires_at[jti] = expires_at
+
+    def is_revoked(self, jti: str):
+        return jti in self._bloom and jti in self._expires_at
+
+    def refresh_due(self):
+        return self._timer() >= self._next_refresh
+
+    async def refresh(self, session: AsyncSession):
+        """Pull revocations added since the last refresh, if one is due."""
+        if not self.refresh_due():
+            return
+        # Claim the refresh before awaiting so concurrent requests skip it.
+        self._next_refresh = self._timer() + self.refresh_interval
+        rows = await session.execute(
+            select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at)
+            .where(
+                RevokedToken.id > self._last_id - REFRESH_OVERLAP,
+                RevokedToken.expires_at > func.now(),
+            )
+            .order_by(RevokedToken.id)
+        )
+        for row in rows:
+            self.add(row.jti, row.expires_at)
+            self._last_id = max(self._last_id, row.id)
+        self._prune()
+
+    def _prune(self):
+        now = datetime.now().astimezone()
+        expired = [
+            jti
+            for jti, expires_at in self._expires_at.items()
+            if expires_at <= now
+        ]
+        if not expired:
+            return
+        for jti in expired:
+            del self._expires_at[jti]
+        # Bloom filters can't forget, so rebuild from what is left.
+        self._bloom = BloomFilter(self.capacity)
+        for jti in self._expires_at:
+            self._bloom.add(jti)
+
+
+async def revoke(session: AsyncSession, jti: str, expires_at: datetime):
+    """
+    Persist the revocation of ``jti``. The caller commits and only then
+    adds it to its ``RevocationList``, so a rolled back revocation is not
+    enforced by this worker alone.
+    """
+    await session.execute(
+        insert(RevokedToken)
+        .values(jti=jti, expires_at=expires_at)
+        .on_conflict_do_nothing()
+    )
+    # Expired tokens are rejected on their own; their rows can go.
+    await session.execute(
+        delete(RevokedToken).where(RevokedToken.expires_at <= func.now())
+    )
@@ -0,0 +1,41 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from fastapi.exceptions import HTTPException
+
+from fast_zero.database import engine, pool_stats
+from fast_zero.instrumentation import InstrumentedRoute
+from fast_zero.models import User
+from fast_zero.schemas import PoolStats
+from fast_zero.security import get_current_user
+from fast_zero.settings import Settings
+
+settings = Settings()
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    route_class=InstrumentedRoute,
+)
+
+
+async def get_admin_user(user: User = Depends(get_current_user)):
+    """The current user, if listed in ``ADMIN_EMAILS``."""
+    if user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN, detail="Not enough permissions"
+        )
+    return user
+
+
+T_AdminUser = Annotated[User, Depends(get_admin_user)]
+
+
+@router.get("/pool", response_model=PoolStats)
+async def read_pool_stats(user: T_AdminUser):
+    """
+    Connection pool usage of this worker process, for sizing
+    ``DATABASE_POOL_SIZE`` and ``DATABASE_MAX_OVERFLOW``.
+    """
+    return pool_stats(engine)
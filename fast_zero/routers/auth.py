@@ -1,35 +1,62 @@
+import math
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.exceptions import HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fast_zero.database import get_session
+from fast_zero.instrumentation import InstrumentedRoute
 from fast_zero.models import User
-from fast_zero.schemas import Token
+from fast_zero.revocation import revoke
+from fast_zero.schemas import Message, Token, TokenData
 from fast_zero.security import (
     create_access_token,
     get_current_user,
-    verify_password,
+    get_token_data,
+    invalidate_cached_user,
+    login_limiter,
+    revocations,
+    token_claims,
+    verify_and_update_password,
 )
 
 router = APIRouter(
     prefix="/auth",
     tags=["auth"],
+    route_class=InstrumentedRoute,
 )
-T_Session = Annotated[Session, Depends(get_session)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
 T_Form = Annotated[OAuth2PasswordRequestForm, Depends()]
 
 
-@router.post("/token", response_model=Token)
-def login_for_access_token(
+async def limit_login_attempts(request: Request, form_data: T_Form):
+    """Reject excess attempts per client IP and per email, before hashing."""
+    retry_after = await login_limiter.acquire(
+        ip=request.client.host if request.client else "unknown",
+        email=form_data.username.lower(),
+    )
+    if retry_after:
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+@router.post(
+    "/token",
+    response_model=Token,
+    dependencies=[Depends(limit_login_attempts)],
+)
+async def login_for_access_token(
     session: T_Session,
     form_data: T_Form,
 ):
-    user = session.scalar(
+    user = await session.scalar(
         select(User).where(User.email == form_data.username)
     )
 
@@ -39,17 +66,41 @@ def login_for_access_token(
             detail="Incorrect email or password",
         )
 
-    if not verify_password(form_data.password, user.password):
+    valid, new_hash = await verify_and_update_password(
+        form_data.password, user.password
+    )
+    if not valid:
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail="Incorrect email or password",
         )
+    if new_hash:
+        # Same password, new Argon2 parameters: issued tokens stay valid
+        # and the public representation (updated_at) is untouched.
+        await session.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(password=new_hash, updated_at=User.updated_at)
+        )
+        await session.commit()
+        invalidate_cached_user(user.email)
 
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_access_token(data=token_claims(user))
     return {"access_token": access_token, "token_type": "Bearer"}
 
 
 @router.post("/refresh_token", response_model=Token)
-def refresh_access_token(user: User = Depends(get_current_user)):
-    new_access_token = create_access_token(data={"sub": user.email})
+async def refresh_access_token(user: User = Depends(get_current_user)):
+    new_access_token = create_access_token(data=token_claims(user))
     return {"access_token": new_access_token, "token_type": "Bearer"}
+
+
+@router.post("/logout", response_model=Message)
+async def logout(
+    session: T_Session, token_data: TokenData = Depends(get_token_data)
+):
+    """Revoke the access token used to call this endpoint."""
+    await revoke(session, token_data.jti, token_data.expires_at)
+    await session.commit()
+    revocations.add(token_data.jti, token_data.expires_at)
+    return {"message": "Logged out"}
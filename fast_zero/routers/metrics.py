@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from fast_zero import metrics
+from fast_zero.admission import admission_controller
+from fast_zero.database import engine
+from fast_zero.instrumentation import InstrumentedRoute
+from fast_zero.security import hashing_executor, user_cache
+
+router = APIRouter(tags=["metrics"], route_class=InstrumentedRoute)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(
+        metrics.render(
+            engine.pool, hashing_executor, user_cache, admission_controller
+        ),
+        media_type=metrics.CONTENT_TYPE,
+    )
@@ -1,98 +1,408 @@
+import csv
+import io
+import json
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import (
+    Integer,
+    any_,
+    bindparam,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    literal_column,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from fast_zero.database import get_session
+from fast_zero.database import get_read_session, get_session
+from fast_zero.http_cache import (
+    bump_todos_version,
+    etag_matches,
+    make_etag,
+    not_modified,
+    with_todos_version_bump,
+)
+from fast_zero.importer import import_todos, iter_lines
+from fast_zero.instrumentation import InstrumentedRoute
 from fast_zero.models import Todo, User
+from fast_zero.pagination import decode_cursor, paginate
 from fast_zero.schemas import (
     Message,
+    TodoBulkCreateSchema,
+    TodoBulkDeleteSchema,
+    TodoBulkResultList,
+    TodoBulkUpdateSchema,
+    TodoImportReport,
     TodoListSchema,
     TodoPublicSchema,
     TodoSchema,
     TodoUpdateSchema,
 )
-from fast_zero.security import get_current_user
+from fast_zero.security import Principal, get_current_principal
+from fast_zero.serialization import (
+    TODO_FIELDS,
+    parse_fields,
+    todo_list_response,
+)
+from fast_zero.settings import Settings
 
-T_Session = Annotated[Session, Depends(get_session)]
-T_CurrentUser = Annotated[User, Depends(get_current_user)]
+settings = Settings()
 
-router = APIRouter(prefix="/todos", tags=["todos"])
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+T_CurrentUser = Annotated[Principal, Depends(get_current_principal)]
+
+router = APIRouter(
+    prefix="/todos", tags=["todos"], route_class=InstrumentedRoute
+)
+
+TODO_PUBLIC_COLUMNS = (
+    Todo.id,
+    Todo.title,
+    Todo.description,
+    Todo.state,
+    Todo.created_at,
+    Todo.updated_at,
+)
+TODOS_CACHE_CONTROL = "private, no-cache"
+TODO_COLUMNS_BY_NAME = {column.key: column for column in TODO_PUBLIC_COLUMNS}
+EXPORT_FIELDS = [c.key for c in TODO_PUBLIC_COLUMNS]
+EXPORT_BATCH_SIZE = 1_000
 
 
 @router.get("/", response_model=TodoListSchema)
-def list_todos(  # noqa
-    session: T_Session,
+async def list_todos(  # noqa
+    request: Request,
+    response: Response,
+    session: T_ReadSession,
     user: T_CurrentUser,
     title: str = Query(None),
     description: str = Query(None),
     state: str = Query(None),
+    q: str = Query(None),
     offset: int = Query(None),
-    limit: int = Query(None),
+    limit: int = Query(None, ge=1),
+    cursor: str = Query(None),
+    fields: str = Query(None),
 ):
-    query = select(Todo).where(Todo.user_id == user.id)
+    """
+    List the current user's todos. ``fields`` (e.g. ``id,title,state``)
+    restricts both the selected columns and the returned keys.
+    """
+    selected = parse_fields(fields, TODO_FIELDS)
+    version = await session.scalar(
+        select(User.todos_version).where(User.id == user.id)
+    )
+    etag = make_etag(
+        "todos", user.id, version, sorted(request.query_params.multi_items())
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag, TODOS_CACHE_CONTROL)
+    cache_headers = {"ETag": etag, "Cache-Control": TODOS_CACHE_CONTROL}
+    response.headers.update(cache_headers)
+
+    # Plain rows instead of Todo instances: nothing is hydrated into the
+    # identity map just to be serialized and dropped.
+    columns = TODO_PUBLIC_COLUMNS
+    if selected is not None:
+        columns = [TODO_COLUMNS_BY_NAME[name] for name in selected]
+    query = select(*columns).where(Todo.user_id == user.id)
     if title:
         query = query.filter(Todo.title.contains(title))
     if description:
         query = query.filter(Todo.description.contains(description))
     if state:
         query = query.filter(Todo.state == state)
-    todos = session.scalars(query.offset(offset).limit(limit)).all()
-    return {"todos": todos}
+
+    if q:
+        # Search results are ranked by relevance, so the id-based cursor
+        # doesn't apply to them.
+        if cursor:
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail="Cursor pagination is not supported with q",
+            )
+        tsquery = func.websearch_to_tsquery(literal_column("'simple'"), q)
+        rank = func.ts_rank_cd(Todo.search_vector, tsquery)
+        query = query.filter(Todo.search_vector.op("@@")(tsquery))
+        query = query.order_by(rank.desc(), Todo.id)
+    else:
+        if cursor:
+            query = query.filter(Todo.id > decode_cursor(cursor))
+        query = query.order_by(Todo.id)
+
+    query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    todos = await session.execute(query)
+    todos, next_cursor = paginate(todos.all(), limit)
+    next_cursor = None if q else next_cursor
+    if selected is not None:
+        return todo_list_response(
+            todos, next_cursor, cache_headers, fields=selected
+        )
+    if settings.FAST_RESPONSES:
+        return todo_list_response(todos, next_cursor, cache_headers)
+    return {"todos": todos, "next_cursor": next_cursor}
+
+
+@router.get("/export")
+async def export_todos(
+    session: T_ReadSession,
+    user: T_CurrentUser,
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+):
+    """
+    Stream every todo of the current user as NDJSON or CSV.
+
+    Rows are read through a server-side cursor in batches of
+    ``EXPORT_BATCH_SIZE``, so memory use doesn't grow with the export.
+    """
+    result = await session.stream(
+        select(*TODO_PUBLIC_COLUMNS)
+        .where(Todo.user_id == user.id)
+        .order_by(Todo.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    encode = _encode_csv if export_format == "csv" else _encode_ndjson
+
+    async def content():
+        if export_format == "csv":
+            yield ",".join(EXPORT_FIELDS) + "\r\n"
+        async for rows in result.partitions():
+            yield encode(rows)
+
+    media_type = (
+        "text/csv" if export_format == "csv" else "application/x-ndjson"
+    )
+    filename = f"todos.{export_format}"
+    return StreamingResponse(
+        content(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _export_values(row):
+    todo_id, title, description, state, created_at, updated_at = row
+    return (
+        todo_id,
+        title,
+        description,
+        state.value,
+        created_at.isoformat(),
+        updated_at.isoformat(),
+    )
+
+
+def _encode_ndjson(rows):
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, _export_values(row)))) + "\n"
+        for row in rows
+    )
+
+
+def _encode_csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(_export_values(row) for row in rows)
+    return buffer.getvalue()
+
+
+@router.post("/import", response_model=TodoImportReport)
+async def import_todos_file(
+    request: Request,
+    session: T_Session,
+    user: T_CurrentUser,
+    import_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+):
+    """
+    Load todos for the current user from an NDJSON or CSV request body.
+
+    The body is read as a stream and loaded with COPY in batches; lines
+    that fail validation are reported and skipped.
+    """
+    report = await import_todos(
+        session, user.id, iter_lines(request.stream()), import_format
+    )
+    await session.execute(bump_todos_version(user.id))
+    await session.commit()
+    return report
 
 
 @router.post("/", response_model=TodoPublicSchema)
-def create_todo(
+async def create_todo(
     todo_schema: TodoSchema, user: T_CurrentUser, session: T_Session
 ):
-    todo = Todo(
-        title=todo_schema.title,
-        description=todo_schema.description,
-        state=todo_schema.state,
-        user_id=user.id,
+    result = await session.execute(
+        with_todos_version_bump(
+            insert(Todo)
+            .values(**todo_schema.model_dump(), user_id=user.id)
+            .returning(*TODO_PUBLIC_COLUMNS),
+            user.id,
+        )
     )
-
-    session.add(todo)
-    session.commit()
-    session.refresh(todo)
+    todo = result.one()
+    await session.commit()
     return todo
 
 
+@router.post("/bulk", response_model=TodoBulkResultList)
+async def create_todos_bulk(
+    bulk_schema: TodoBulkCreateSchema, user: T_CurrentUser, session: T_Session
+):
+    rows = [
+        {**todo_schema.model_dump(), "user_id": user.id}
+        for todo_schema in bulk_schema.todos
+    ]
+    result = await session.execute(
+        insert(Todo).returning(
+            *TODO_PUBLIC_COLUMNS, sort_by_parameter_order=True
+        ),
+        rows,
+    )
+    todos = result.mappings().all()
+    await session.execute(bump_todos_version(user.id))
+    await session.commit()
+    return {
+        "results": [
+            {"id": todo["id"], "status": "created", "todo": todo}
+            for todo in todos
+        ]
+    }
+
+
+@router.patch("/bulk", response_model=TodoBulkResultList)
+async def patch_todos_bulk(
+    bulk_schema: TodoBulkUpdateSchema, user: T_CurrentUser, session: T_Session
+):
+    # Repeated ids: the last occurrence wins.
+    items = {item.id: item for item in bulk_schema.todos}
+    changes = values(
+        column("id", Integer),
+        column("title", Todo.title.type),
+        column("description", Todo.description.type),
+        column("state", Todo.state.type),
+        name="changes",
+    ).data(
+        [
+            (item.id, item.title, item.description, item.state)
+            for item in items.values()
+        ]
+    )
+    result = await session.execute(
+        update(Todo)
+        .where(Todo.id == changes.c.id, Todo.user_id == user.id)
+        .values(
+            title=func.coalesce(changes.c.title, Todo.title),
+            description=func.coalesce(changes.c.description, Todo.description),
+            # An untyped VALUES column holding NULLs resolves to text.
+            state=func.coalesce(
+                cast(changes.c.state, Todo.state.type), Todo.state
+            ),
+        )
+        .returning(*TODO_PUBLIC_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    updated = {todo["id"]: todo for todo in result.mappings()}
+    await session.execute(bump_todos_version(user.id))
+    await session.commit()
+    return {
+        "results": [
+            {"id": todo_id, "status": "updated", "todo": updated[todo_id]}
+            if todo_id in updated
+            else {"id": todo_id, "status": "not_found"}
+            for todo_id in items
+        ]
+    }
+
+
+@router.delete("/bulk", response_model=TodoBulkResultList)
+async def delete_todos_bulk(
+    bulk_schema: TodoBulkDeleteSchema, user: T_CurrentUser, session: T_Session
+):
+    ids = list(dict.fromkeys(bulk_schema.ids))
+    result = await session.execute(
+        delete(Todo)
+        .where(
+            Todo.user_id == user.id,
+            Todo.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))),
+        )
+        .returning(Todo.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = set(result.scalars())
+    await session.execute(bump_todos_version(user.id))
+    await session.commit()
+    return {
+        "results": [
+            {
+                "id": todo_id,
+                "status": "deleted" if todo_id in deleted else "not_found",
+            }
+            for todo_id in ids
+        ]
+    }
+
+
 @router.patch("/{todo_id}", response_model=TodoPublicSchema)
-def patch_todo(
+async def patch_todo(
     todo_id: int,
     session: T_Session,
     user: T_CurrentUser,
     todo_update_schema: TodoUpdateSchema,
 ):
-    todo = session.scalar(
-        select(Todo).where(Todo.user_id == user.id, Todo.id == todo_id)
-    )
+    values_to_update = todo_update_schema.model_dump(exclude_unset=True)
+    owned = (Todo.user_id == user.id, Todo.id == todo_id)
+    if values_to_update:
+        statement = with_todos_version_bump(
+            update(Todo)
+            .where(*owned)
+            .values(**values_to_update)
+            .returning(*TODO_PUBLIC_COLUMNS),
+            user.id,
+        )
+    else:
+        # Nothing to change: just read the todo back.
+        statement = select(*TODO_PUBLIC_COLUMNS).where(*owned)
+    result = await session.execute(statement)
+    todo = result.first()
     if not todo:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail="Task not found."
         )
-    values_to_update = todo_update_schema.model_dump(exclude_unset=True)
-    for key, value in values_to_update.items():
-        setattr(todo, key, value)
-    session.add(todo)
-    session.commit()
-    session.refresh(todo)
+    await session.commit()
     return todo
 
 
 @router.delete("/{todo_id}", response_model=Message)
-def delete_todo(todo_id: int, session: T_Session, user: T_CurrentUser):
-    todo = session.scalar(
-        select(Todo).where(Todo.user_id == user.id, Todo.id == todo_id)
+async def delete_todo(todo_id: int, session: T_Session, user: T_CurrentUser):
+    result = await session.execute(
+        with_todos_version_bump(
+            delete(Todo)
+            .where(Todo.user_id == user.id, Todo.id == todo_id)
+            .returning(Todo.id),
+            user.id,
+        )
     )
-
-    if not todo:
+    if result.first() is None:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail="Task not found."
         )
-    session.delete(todo)
-    session.commit()
+    await session.commit()
     return {"message": "Task has been deleted successfully."}
@@ -1,79 +1,180 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
 from fastapi.exceptions import HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from fast_zero.database import get_session
+from fast_zero.database import get_read_session, get_session
+from fast_zero.http_cache import etag_matches, make_etag, not_modified
+from fast_zero.instrumentation import InstrumentedRoute
 from fast_zero.models import User
+from fast_zero.pagination import decode_cursor, paginate
 from fast_zero.schemas import Message, UserList, UserPublic, UserSchema
 from fast_zero.security import (
     get_current_user,
     get_password_hash,
+    invalidate_cached_user,
+    revoke_user_tokens,
 )
+from fast_zero.serialization import (
+    USER_FIELDS,
+    FastJSONResponse,
+    parse_fields,
+    user_list_response,
+)
+from fast_zero.settings import Settings
+
+settings = Settings()
 
 router = APIRouter(
     prefix="/users",
     tags=["users"],
+    route_class=InstrumentedRoute,
 )
-T_Session = Annotated[Session, Depends(get_session)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
 T_CurrentUser = Annotated[User, Depends(get_current_user)]
 
+USER_CACHE_CONTROL = "no-cache"
+USER_PUBLIC_COLUMNS = (
+    User.id,
+    User.username,
+    User.email,
+    User.created_at,
+    User.updated_at,
+)
+UNIQUE_CONSTRAINT_DETAILS = {
+    "users_username_key": "Username already exists.",
+    "users_email_key": "Email already exists.",
+}
+USER_COLUMNS_BY_NAME = {column.key: column for column in USER_PUBLIC_COLUMNS}
+
 
 @router.post("/", response_model=UserPublic, status_code=HTTPStatus.CREATED)
-def create_user(user_schema: UserSchema, session: T_Session):
+async def create_user(user_schema: UserSchema, session: T_Session):
     """
     Create user if not exists in database.
     """
-    user = session.scalar(
-        select(User).where(
-            (User.username == user_schema.username)
-            | (User.email == user_schema.email)
+    result = await session.execute(
+        insert(User)
+        .values(
+            username=user_schema.username,
+            password=await get_password_hash(user_schema.password),
+            email=user_schema.email,
         )
+        .on_conflict_do_nothing()
+        .returning(*USER_PUBLIC_COLUMNS)
     )
-    if user:
-        detail = None
-        if user.username == user_schema.username:
-            detail = "Username already exists."
-        elif user.email == user_schema.email:
-            detail = "Email already exists."
-        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=detail)
-
-    user = User(
-        username=user_schema.username,
-        password=get_password_hash(user_schema.password),
-        email=user_schema.email,
-    )
-    session.add(user)
-    session.commit()
-    session.refresh(user)
+    user = result.first()
+    if user is None:
+        # Only the losing path pays for a second query, to say which
+        # column collided.
+        existing = await session.execute(
+            select(User.username, User.email).where(
+                (User.username == user_schema.username)
+                | (User.email == user_schema.email)
+            )
+        )
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=_conflict_detail(user_schema, existing.first()),
+        )
+    await session.commit()
     return user
 
 
+def _conflict_detail(user_schema: UserSchema, existing):
+    if existing is None or existing.username == user_schema.username:
+        return "Username already exists."
+    return "Email already exists."
+
+
 @router.get("/", response_model=UserList, status_code=HTTPStatus.OK)
-def read_users(
-    session: T_Session,
+async def read_users(
+    session: T_ReadSession,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1),
+    cursor: str | None = None,
+    fields: str | None = None,
 ):
-    users = session.scalars(select(User).offset(skip).limit(limit)).all()
-    return {"users": users}
+    selected = parse_fields(fields, USER_FIELDS)
+    query = select(*_user_columns(selected)).order_by(User.id)
+    if cursor:
+        query = query.where(User.id > decode_cursor(cursor))
+    users = await session.execute(query.offset(skip).limit(limit + 1))
+    users, next_cursor = paginate(users.all(), limit)
+    if selected is not None:
+        return user_list_response(users, next_cursor, fields=selected)
+    if settings.FAST_RESPONSES:
+        return user_list_response(users, next_cursor)
+    return {"users": users, "next_cursor": next_cursor}
 
 
 @router.get("/{user_id}", response_model=UserPublic, status_code=HTTPStatus.OK)
-def read_user(user_id: int, session: T_Session):
-    user = session.scalar(select(User).where(User.id == user_id))
+async def read_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    session: T_ReadSession,
+    fields: str | None = None,
+):
+    selected = parse_fields(fields, USER_FIELDS)
+    if request.headers.get("if-none-match"):
+        # Revalidation only needs the version, not the whole row.
+        updated_at = await session.scalar(
+            select(User.updated_at).where(User.id == user_id)
+        )
+        if updated_at is not None:
+            etag = _user_etag(user_id, updated_at, selected)
+            if etag_matches(request, etag):
+                return not_modified(etag, USER_CACHE_CONTROL)
+
+    if selected is not None:
+        user = await session.execute(
+            select(
+                *_user_columns(selected), User.updated_at.label("version")
+            ).where(User.id == user_id)
+        )
+        user = user.first()
+    else:
+        user = await session.scalar(select(User).where(User.id == user_id))
     if user is None:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail="User not found"
         )
+
+    if selected is not None:
+        headers = {
+            "ETag": _user_etag(user_id, user.version, selected),
+            "Cache-Control": USER_CACHE_CONTROL,
+        }
+        return FastJSONResponse(
+            {name: getattr(user, name) for name in selected}, headers=headers
+        )
+    response.headers["ETag"] = _user_etag(user.id, user.updated_at)
+    response.headers["Cache-Control"] = USER_CACHE_CONTROL
     return user
 
 
+def _user_columns(selected):
+    if selected is None:
+        return USER_PUBLIC_COLUMNS
+    return [USER_COLUMNS_BY_NAME[name] for name in selected]
+
+
+def _user_etag(user_id: int, updated_at, fields=None):
+    parts = ["user", user_id, updated_at.isoformat()]
+    if fields is not None:
+        parts.append(",".join(fields))
+    return make_etag(*parts)
+
+
 @router.put("/{user_id}", response_model=UserPublic)
-def update_user(
+async def update_user(
     user_id: int,
     user_schema: UserSchema,
     session: T_Session,
@@ -84,16 +185,41 @@ def update_user(
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN, detail="Not enough permissions"
         )
-    current_user.username = user_schema.username
-    current_user.password = get_password_hash(user_schema.password)
-    current_user.email = user_schema.email
-    session.commit()
-    session.refresh(current_user)
-    return current_user
+    previous_email = current_user.email
+    previous_version = current_user.token_version
+    try:
+        result = await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                username=user_schema.username,
+                password=await get_password_hash(user_schema.password),
+                email=user_schema.email,
+                # The password may have changed: retire issued tokens.
+                token_version=User.token_version + 1,
+            )
+            .returning(*USER_PUBLIC_COLUMNS)
+        )
+        user = result.one()
+        await revoke_user_tokens(session, user_id, previous_version)
+        await session.commit()
+    except IntegrityError as exc:
+        await session.rollback()
+        detail = UNIQUE_CONSTRAINT_DETAILS.get(_constraint_name(exc))
+        if detail is None:
+            raise
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=detail)
+    invalidate_cached_user(previous_email, user_id)
+    return user
+
+
+def _constraint_name(exc: IntegrityError):
+    diag = getattr(exc.orig, "diag", None)
+    return getattr(diag, "constraint_name", None)
 
 
 @router.delete("/{user_id}", response_model=Message)
-def delete_user(
+async def delete_user(
     user_id: int,
     session: T_Session,
     current_user: T_CurrentUser,
@@ -103,6 +229,8 @@ def delete_user(
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN, detail="Not enough permissions"
         )
-    session.delete(current_user)
-    session.commit()
+    await revoke_user_tokens(session, user_id, current_user.token_version)
+    await session.delete(current_user)
+    await session.commit()
+    invalidate_cached_user(current_user.email, user_id)
     return {"message": "User deleted"}
@@ -1,9 +1,11 @@
 from datetime import datetime
 
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 from fast_zero.models import TodoState
 
+BULK_MAX_ITEMS = 5_000
+
 
 class Message(BaseModel):
     message: str
@@ -30,6 +32,7 @@ class UserPublic(BaseModel):
 
 class UserList(BaseModel):
     users: list[UserPublic]
+    next_cursor: str | None = None
 
 
 class Token(BaseModel):
@@ -45,6 +48,7 @@ class TodoUpdateSchema(BaseModel):
 
 class TodoSchema(BaseModel):
     """Todo input data model"""
+
     title: str
     description: str
     state: TodoState
@@ -52,6 +56,7 @@ class TodoSchema(BaseModel):
 
 class TodoPublicSchema(TodoSchema):
     """Public todo response data model"""
+
     id: int
     created_at: datetime
     updated_at: datetime
@@ -59,7 +64,71 @@ class TodoPublicSchema(TodoSchema):
 
 class TodoListSchema(BaseModel):
     todos: list[TodoPublicSchema]
+    next_cursor: str | None = None
+
+
+class TodoBulkCreateSchema(BaseModel):
+    todos: list[TodoSchema] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class TodoBulkUpdateItem(TodoUpdateSchema):
+    id: int
+    state: TodoState | None = None
+
+
+class TodoBulkUpdateSchema(BaseModel):
+    todos: list[TodoBulkUpdateItem] = Field(
+        min_length=1, max_length=BULK_MAX_ITEMS
+    )
+
+
+class TodoBulkDeleteSchema(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class TodoBulkResult(BaseModel):
+    """Outcome of one item of a bulk request"""
+
+    id: int
+    status: str
+    todo: TodoPublicSchema | None = None
+
+
+class TodoBulkResultList(BaseModel):
+    results: list[TodoBulkResult]
+
+
+class TodoImportError(BaseModel):
+    line: int
+    error: str
+
+
+class TodoImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: list[TodoImportError]
+    elapsed_seconds: float
+    rows_per_second: float
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TokenData(BaseModel):
     username: str | None = None
+    user_id: int | None = None
+    token_version: int | None = None
+    jti: str | None = None
+    expires_at: datetime | None = None
+
+
+class PoolStats(BaseModel):
+    pool: str
+    pre_ping: bool
+    recycle: int
+    checkout_count: int
+    checkout_seconds: float
+    size: int | None = None
+    max_overflow: int | None = None
+    timeout: float | None = None
+    checked_out: int | None = None
+    checked_in: int | None = None
+    overflow: int | None = None
@@ -1,32 +1,110 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from http import HTTPStatus
+from uuid import uuid4
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jwt import DecodeError, ExpiredSignatureError, decode, encode
-from pwdlib import PasswordHash
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from zoneinfo import ZoneInfo
 
+from fast_zero.cache import TTLCache
 from fast_zero.database import get_session
+from fast_zero.hashing import (
+    Argon2Params,
+    HashingExecutor,
+    HashingUnavailable,
+    check_and_update_password,
+    check_password,
+    hash_password,
+)
+from fast_zero.instrumentation import timed
 from fast_zero.models import User
+from fast_zero.ratelimit import MemoryBackend, Rate, RateLimiter
+from fast_zero.revocation import RevocationList, revoke
 from fast_zero.schemas import TokenData
 from fast_zero.settings import Settings
 
 settings = Settings()
 
-pwd_context = PasswordHash.recommended()
+hashing_executor = HashingExecutor(
+    kind=settings.HASH_EXECUTOR,
+    workers=settings.HASH_WORKERS,
+    queue_size=settings.HASH_QUEUE_SIZE,
+    timeout=settings.HASH_TIMEOUT_SECONDS,
+)
+
+argon2_params = Argon2Params(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
+)
+
+user_cache = TTLCache(
+    maxsize=settings.AUTH_CACHE_MAXSIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS
+)
+
+# user id -> current token version, for get_current_principal.
+token_versions = TTLCache(
+    maxsize=settings.AUTH_CACHE_MAXSIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS
+)
+
+revocations = RevocationList(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    refresh_interval=settings.REVOCATION_REFRESH_SECONDS,
+)
+
+login_limiter = RateLimiter(
+    MemoryBackend(maxsize=settings.LOGIN_RATE_LIMIT_MAXSIZE),
+    {
+        "ip": Rate(settings.LOGIN_IP_BURST, settings.LOGIN_IP_PER_MINUTE),
+        "email": Rate(
+            settings.LOGIN_EMAIL_BURST, settings.LOGIN_EMAIL_PER_MINUTE
+        ),
+    },
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 
-def get_password_hash(password: str):
-    return pwd_context.hash(password)
+async def _run_hashing(fn, *args):
+    try:
+        with timed("hash_seconds"):
+            return await hashing_executor.run(fn, *args)
+    except HashingUnavailable:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": "1"},
+        )
 
 
-def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+async def get_password_hash(password: str):
+    return await _run_hashing(hash_password, password, argon2_params)
+
+
+async def verify_password(plain_password: str, hashed_password: str):
+    return await _run_hashing(
+        check_password, plain_password, hashed_password, argon2_params
+    )
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+):
+    """
+    Return ``(valid, new_hash)``; ``new_hash`` is set when the stored hash
+    was made with other Argon2 parameters than the configured ones.
+    """
+    return await _run_hashing(
+        check_and_update_password,
+        plain_password,
+        hashed_password,
+        argon2_params,
+    )
 
 
 def create_access_token(data: dict):
@@ -34,40 +112,173 @@ def create_access_token(data: dict):
     expire = datetime.now(tz=ZoneInfo("UTC")) + timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid4().hex})
     encode_jwt = encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return encode_jwt
 
 
-def get_current_user(
-    session: Session = Depends(get_session),
-    token: str = Depends(oauth2_scheme),
-):
-    credentials_exception = HTTPException(
+def token_claims(user: User):
+    """Claims identifying ``user`` in an access token."""
+    return {"sub": user.email, "uid": user.id, "ver": user.token_version}
+
+
+def _credentials_exception():
+    return HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _decode_token(token: str):
     try:
         payload = decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
 
         username: str = payload.get("sub")
-        if not username:
-            raise credentials_exception
-        token_data = TokenData(username=username)
+        if not username or "exp" not in payload:
+            raise _credentials_exception()
+        return TokenData(
+            username=username,
+            user_id=payload.get("uid"),
+            token_version=payload.get("ver"),
+            jti=payload.get("jti"),
+            expires_at=datetime.fromtimestamp(
+                payload["exp"], tz=ZoneInfo("UTC")
+            ),
+        )
     except DecodeError:
-        raise credentials_exception
+        raise _credentials_exception()
     except ExpiredSignatureError:
-        raise credentials_exception
+        raise _credentials_exception()
+
+
+async def get_token_data(
+    session: AsyncSession = Depends(get_session),
+    token: str = Depends(oauth2_scheme),
+):
+    """Decoded claims of a valid token that has not been revoked."""
+    token_data = _decode_token(token)
+    if token_data.jti is None:
+        raise _credentials_exception()
+    if revocations.refresh_due():
+        await revocations.refresh(session)
+    if revocations.is_revoked(token_data.jti):
+        raise _credentials_exception()
+    if token_data.user_id is not None and revocations.is_revoked(
+        _version_key(token_data.user_id, token_data.token_version)
+    ):
+        raise _credentials_exception()
+    return token_data
+
+
+def _version_key(user_id: int, token_version: int):
+    return f"user:{user_id}:{token_version}"
 
-    user = session.scalar(
+
+async def revoke_user_tokens(
+    session: AsyncSession, user_id: int, token_version: int
+):
+    """
+    Reject every token issued to ``user_id`` at ``token_version``, in all
+    workers. Their caches may still hold that version, so this goes
+    through the revocation list, which they pull from the database within
+    ``REVOCATION_REFRESH_SECONDS``. The caller commits and then calls
+    ``invalidate_cached_user``, which makes this worker reject the old
+    version right away.
+    """
+    # No token of that version outlives this.
+    expires_at = datetime.now(tz=ZoneInfo("UTC")) + timedelta(
+        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    )
+    await revoke(session, _version_key(user_id, token_version), expires_at)
+
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_session),
+    token: str = Depends(oauth2_scheme),
+):
+    token_data = await get_token_data(session, token)
+
+    snapshot = user_cache.get(token_data.username)
+    # A snapshot of another version may be stale (the bump happened in
+    # another worker), so only a match is trusted without a query.
+    if (
+        snapshot is not None
+        and snapshot["token_version"] == token_data.token_version
+    ):
+        return await _attach_cached_user(session, snapshot)
+
+    user = await session.scalar(
         select(User).where(User.email == token_data.username)
     )
     if not user:
-        raise credentials_exception
+        raise _credentials_exception()
+    user_cache.set(token_data.username, _snapshot_user(user))
+    if user.token_version != token_data.token_version:
+        raise _credentials_exception()
     return user
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as told by the token claims."""
+
+    id: int
+    email: str
+
+
+async def get_current_principal(
+    session: AsyncSession = Depends(get_session),
+    token: str = Depends(oauth2_scheme),
+):
+    """
+    Lighter ``get_current_user`` for handlers that only need the user id.
+    The token version is checked against a cache, so a warm request sends
+    no query; a password change or deletion still rejects the token.
+    """
+    token_data = await get_token_data(session, token)
+    if token_data.user_id is None or token_data.token_version is None:
+        raise _credentials_exception()
+
+    token_version = token_versions.get(token_data.user_id)
+    if token_version != token_data.token_version:
+        # Not cached, or cached before a bump made in another worker.
+        token_version = await session.scalar(
+            select(User.token_version).where(User.id == token_data.user_id)
+        )
+        if token_version is None:
+            raise _credentials_exception()
+        token_versions.set(token_data.user_id, token_version)
+    if token_version != token_data.token_version:
+        raise _credentials_exception()
+    return Principal(id=token_data.user_id, email=token_data.username)
+
+
+def invalidate_cached_user(email: str, user_id: int | None = None):
+    """Drop what is cached about a user after it changes."""
+    user_cache.invalidate(email)
+    if user_id is not None:
+        token_versions.invalidate(user_id)
+
+
+def _snapshot_user(user: User):
+    loaded = inspect(user).dict
+    return {
+        attr.key: loaded[attr.key]
+        for attr in inspect(User).column_attrs
+        if attr.key in loaded
+    }
+
+
+async def _attach_cached_user(session: AsyncSession, snapshot: dict):
+    # Rebuild a detached instance from the snapshot and merge it without
+    # loading, so the handler gets a persistent User and no SELECT is sent.
+    user = User.__mapper__.class_manager.new_instance()
+    for key, value in snapshot.items():
+        setattr(user, key, value)
+    make_transient_to_detached(user)
+    return await session.merge(user, load=False)
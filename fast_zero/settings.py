@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,6 +8,61 @@ class Settings(BaseSettings):
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
     )
     DATABASE_URL: str
+    # "queue" keeps a pool per process; "null" opens a connection per
+    # checkout, for when an external pooler (PgBouncer) does the pooling.
+    DATABASE_POOL: Literal["queue", "null"] = "queue"
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 20
+    DATABASE_POOL_TIMEOUT: float = 30.0
+    DATABASE_POOL_RECYCLE: int = -1
+    DATABASE_POOL_PRE_PING: bool = False
+    # PgBouncer in transaction mode can't keep prepared statements.
+    DATABASE_PGBOUNCER: bool = False
+    # JSON list of read replica URLs; reads go to the primary when empty.
+    DATABASE_REPLICA_URLS: list[str] = []
+    DATABASE_REPLICA_COOLDOWN_SECONDS: float = 30.0
+    # Seconds (libpq rounds up to at least 2) before giving up on a
+    # replica connection and falling back to the primary.
+    DATABASE_REPLICA_CONNECT_TIMEOUT: int = 2
+    # Seconds to wait for a free connection in a replica's pool before
+    # trying the next replica or the primary.
+    DATABASE_REPLICA_POOL_TIMEOUT: float = 1.0
+    # After a write, the same client reads from the primary for this long.
+    DATABASE_READ_YOUR_WRITES_SECONDS: float = 5.0
     SECRET_KEY: str
+    # JSON list of emails allowed on /admin; nobody when empty.
+    ADMIN_EMAILS: list[str] = []
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    HASH_EXECUTOR: str = "process"
+    HASH_WORKERS: int | None = None
+    HASH_QUEUE_SIZE: int = 64
+    HASH_TIMEOUT_SECONDS: float = 5.0
+    # Argon2id cost; pick with `fast_zero calibrate-argon2`. Stored hashes
+    # made with other values are upgraded on the next login.
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65_536
+    ARGON2_PARALLELISM: int = 4
+    AUTH_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_CACHE_MAXSIZE: int = 10_000
+    # How often each worker pulls new logouts, password changes and
+    # deletions from revoked_tokens: how long other workers may still
+    # accept the tokens they retired.
+    REVOCATION_REFRESH_SECONDS: float = 5.0
+    REVOCATION_BLOOM_CAPACITY: int = 100_000
+    # Token buckets for /auth/token, checked before any lookup or hashing.
+    LOGIN_IP_BURST: int = 20
+    LOGIN_IP_PER_MINUTE: float = 20.0
+    LOGIN_EMAIL_BURST: int = 5
+    LOGIN_EMAIL_PER_MINUTE: float = 5.0
+    LOGIN_RATE_LIMIT_MAXSIZE: int = 100_000
+    # Requests in flight per route class and in total; the excess waits
+    # up to ADMISSION_QUEUE_SECONDS for a slot, then gets a 503.
+    ADMISSION_READ_LIMIT: int = 40
+    ADMISSION_WRITE_LIMIT: int = 20
+    ADMISSION_AUTH_LIMIT: int = 8
+    ADMISSION_MAX_IN_FLIGHT: int = 48
+    ADMISSION_QUEUE_SECONDS: float = 0.5
+    FAST_RESPONSES: bool = False
+    # Warn when a request sends more queries than this (N+1 detector).
+    QUERY_BUDGET: int | None = None
@@ -0,0 +1,73 @@
+"""Todo search indexes
+
+Revision ID: 3f1c9a7b2d54
+Revises: 245689227edd
+Create Date: 2026-10-18 10:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7b2d54'
+down_revision: Union[str, None] = '245689227edd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # A stored generated column cannot be added without computing it for
+    # every row: this rewrites todos under an ACCESS EXCLUSIVE lock, which
+    # blocks reads and writes of todos until it is done. On a large table
+    # run it in a maintenance window. The indexes below are built
+    # concurrently and do not block writes.
+    op.add_column('todos', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('simple', title), 'A') || "
+            "setweight(to_tsvector('simple', description), 'B')",
+            persisted=True,
+        ),
+        nullable=False,
+    ))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_todos_title_trgm', 'todos', ['title'], unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'title': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_todos_description_trgm', 'todos', ['description'],
+            unique=False, postgresql_using='gin',
+            postgresql_ops={'description': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_todos_search_vector', 'todos', ['search_vector'],
+            unique=False, postgresql_using='gin',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_todos_search_vector', table_name='todos',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_todos_description_trgm', table_name='todos',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_todos_title_trgm', table_name='todos',
+            postgresql_concurrently=True,
+        )
+    op.drop_column('todos', 'search_vector')
@@ -1,14 +1,21 @@
 import factory
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
 from testcontainers.postgres import PostgresContainer
 
 from fast_zero.app import app
 from fast_zero.database import get_session
 from fast_zero.models import User, table_registry
-from fast_zero.security import get_password_hash
+from fast_zero.security import (
+    get_password_hash,
+    login_limiter,
+    revocations,
+    token_versions,
+    user_cache,
+)
 
 
 class UserFactory(factory.Factory):
@@ -20,22 +27,53 @@ class UserFactory(factory.Factory):
     password = factory.LazyAttribute(lambda obj: "obj.username@example.com")
 
 
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def _clear_user_cache():
+    user_cache.clear()
+    token_versions.clear()
+    revocations.clear()
+    login_limiter.backend.clear()
+    yield
+    user_cache.clear()
+    token_versions.clear()
+    revocations.clear()
+    login_limiter.backend.clear()
+
+
+@pytest.fixture
+def timer():
+    return FakeTimer()
+
+
 @pytest.fixture(scope="session")
 def engine():
     with PostgresContainer("postgres:16", driver="psycopg") as postgres:
-        _engine = create_engine(postgres.get_connection_url())
-        with _engine.begin():
-            yield _engine
+        # Cada teste roda em um event loop próprio, então as conexões não
+        # podem ser reaproveitadas entre eles.
+        _engine = create_async_engine(
+            postgres.get_connection_url(), poolclass=NullPool
+        )
+        yield _engine
 
 
-@pytest.fixture
-def session(engine):
-    table_registry.metadata.create_all(engine)
+@pytest_asyncio.fixture
+async def session(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
 
-    with Session(engine) as session:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
 
-    table_registry.metadata.drop_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
 
 
 @pytest.fixture
@@ -51,26 +89,26 @@ def client(session):
     app.dependency_overrides.clear()
 
 
-@pytest.fixture
-def user(session):
+@pytest_asyncio.fixture
+async def user(session):
     password = "super_secret"
-    password_hash = get_password_hash(password)
+    password_hash = await get_password_hash(password)
     user = UserFactory(password=password_hash)
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
     user.clean_password = password
     return user
 
 
-@pytest.fixture
-def other_user(session):
+@pytest_asyncio.fixture
+async def other_user(session):
     password = "password"
-    password_hash = get_password_hash(password)
+    password_hash = await get_password_hash(password)
     user = UserFactory(password=password_hash)
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
     user.clean_password = password
     return user
 
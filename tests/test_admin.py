@@ -0,0 +1,36 @@
+from http import HTTPStatus
+
+import pytest
+
+from fast_zero.routers.admin import settings
+
+
+@pytest.fixture
+def admin(user, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [user.email])
+    return user
+
+
+def test_read_pool_stats(client, admin, token):
+    response = client.get(
+        "/admin/pool", headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    stats = response.json()
+    assert stats["pool"] == "TimedQueuePool"
+    assert stats["checked_out"] >= 0
+
+
+def test_read_pool_stats_requires_an_admin(client, token):
+    response = client.get(
+        "/admin/pool", headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json() == {"detail": "Not enough permissions"}
+
+
+def test_read_pool_stats_requires_authentication(client):
+    response = client.get("/admin/pool")
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
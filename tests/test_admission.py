@@ -0,0 +1,103 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+
+from fast_zero.admission import (
+    AdmissionController,
+    RouteClass,
+    admission_controller,
+    classify,
+)
+
+
+def controller(queue_seconds=1.0):
+    return AdmissionController(
+        [
+            RouteClass("read", limit=1, priority=0),
+            RouteClass("auth", limit=1, priority=2),
+        ],
+        max_in_flight=1,
+        queue_seconds=queue_seconds,
+    )
+
+
+@pytest.mark.parametrize(
+    ("method", "path", "expected"),
+    [
+        ("POST", "/auth/token", "auth"),
+        ("POST", "/users/", "auth"),
+        ("PUT", "/users/1", "auth"),
+        ("GET", "/todos/", "read"),
+        ("POST", "/auth/logout", "write"),
+        ("DELETE", "/users/1", "write"),
+        ("GET", "/metrics", None),
+    ],
+)
+def test_classify(method, path, expected):
+    assert classify({"method": method, "path": path}) == expected
+
+
+@pytest.mark.asyncio
+async def test_reads_are_admitted_before_auth():
+    admission = controller()
+    assert await admission.acquire("read")
+
+    auth = asyncio.ensure_future(admission.acquire("auth"))
+    read = asyncio.ensure_future(admission.acquire("read"))
+    await asyncio.sleep(0)
+    assert admission.queued == {"read": 1, "auth": 1}
+
+    admission.release("read")
+    assert await read
+    assert not auth.done()
+
+    admission.release("read")
+    assert await auth
+    assert admission.in_flight == {"read": 0, "auth": 1}
+
+
+@pytest.mark.asyncio
+async def test_requests_are_shed_after_the_queue_deadline():
+    admission = controller(queue_seconds=0.01)
+    assert await admission.acquire("auth")
+
+    assert not await admission.acquire("auth")
+    assert admission.shed == {"read": 0, "auth": 1}
+    assert admission.queued == {"read": 0, "auth": 0}
+    assert admission.in_flight == {"read": 0, "auth": 1}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_leave_the_queue():
+    admission = controller()
+    assert await admission.acquire("read")
+    waiting = asyncio.ensure_future(admission.acquire("read"))
+    await asyncio.sleep(0)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    assert admission.queued == {"read": 0, "auth": 0}
+    admission.release("read")
+    assert admission.in_flight == {"read": 0, "auth": 0}
+
+
+def test_overload_is_shed_with_503(client, monkeypatch):
+    monkeypatch.setattr(admission_controller, "max_in_flight", 0)
+    monkeypatch.setattr(admission_controller, "queue_seconds", 0)
+    shed = admission_controller.shed["read"]
+
+    response = client.get("/users/")
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers["retry-after"] == "1"
+    assert response.json() == {"detail": "Server is busy, try again later"}
+
+    response = client.get("/metrics")
+    assert response.status_code == HTTPStatus.OK
+    assert (
+        f'fast_zero_admission_shed_total{{class="read"}} {shed + 1}'
+        in response.text
+    )
@@ -1,7 +1,10 @@
 from http import HTTPStatus
 
+import pytest
 from freezegun import freeze_time
 
+from fast_zero.hashing import Argon2Params
+
 
 def test_get_token(client, user):
     data = {"username": user.email, "password": user.clean_password}
@@ -76,3 +79,26 @@ def test_token_expired_dont_refresh(client, user):
 
         assert response.status_code == HTTPStatus.UNAUTHORIZED
         assert response.json() == {"detail": "Could not validate credentials"}
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_password_with_new_params(
+    session, client, user, monkeypatch
+):
+    params = Argon2Params(time_cost=1, memory_cost=1024, parallelism=1)
+    monkeypatch.setattr("fast_zero.security.argon2_params", params)
+    old_hash, token_version = user.password, user.token_version
+
+    data = {"username": user.email, "password": user.clean_password}
+    response = client.post("/auth/token", data=data)
+    assert response.status_code == HTTPStatus.OK
+
+    await session.refresh(user)
+    assert user.password != old_hash
+    assert "m=1024,t=1,p=1" in user.password
+    assert user.token_version == token_version
+
+    response = client.post("/auth/token", data=data)
+    assert response.status_code == HTTPStatus.OK
+    await session.refresh(user)
+    assert "m=1024,t=1,p=1" in user.password
@@ -1,23 +1,30 @@
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from fast_zero.database import make_engine, pool_stats
 from fast_zero.models import Todo, User
+from fast_zero.settings import Settings
 
 
-def test_create_user(session: Session):
+@pytest.mark.asyncio
+async def test_create_user(session: AsyncSession):
     user = User(username="test", email="test@test.com", password="secret")
     session.add(user)
-    session.commit()
-    session.refresh(
+    await session.commit()
+    await session.refresh(
         user
     )  # inicializa/atualiza dados para id, create_at... direto no DB.
-    result = session.scalar(select(User).where(User.email == "test@test.com"))
+    result = await session.scalar(
+        select(User).where(User.email == "test@test.com")
+    )
     assert result.id == 1
     assert result.username == "test"
     assert result.password == "secret"
 
 
-def test_create_todo(session, user: User):
+@pytest.mark.asyncio
+async def test_create_todo(session, user: User):
     todo = Todo(
         title="Test todo",
         description="Test Desc",
@@ -25,7 +32,54 @@ def test_create_todo(session, user: User):
         user_id=user.id,
     )
     session.add(todo)
-    session.commit()
-    session.refresh(todo)
-    user = session.scalar(select(User).where(User.id == user.id))
+    await session.commit()
+    await session.refresh(todo)
+    await session.refresh(user, attribute_names=["todos"])
     assert todo in user.todos
+
+
+def test_make_engine_queue_pool_settings():
+    settings = Settings(
+        DATABASE_POOL_SIZE=3,
+        DATABASE_MAX_OVERFLOW=7,
+        DATABASE_POOL_TIMEOUT=2.5,
+        DATABASE_POOL_PRE_PING=True,
+    )
+    stats = pool_stats(make_engine(settings))
+
+    assert stats["pool"] == "TimedQueuePool"
+    assert stats["size"] == 3  # noqa: PLR2004
+    assert stats["max_overflow"] == 7  # noqa: PLR2004
+    assert stats["timeout"] == 2.5  # noqa: PLR2004
+    assert stats["pre_ping"] is True
+
+
+@pytest.mark.asyncio
+async def test_make_engine_pgbouncer_mode(engine):
+    settings = Settings(
+        DATABASE_URL=engine.url.render_as_string(hide_password=False),
+        DATABASE_POOL="null",
+        DATABASE_PGBOUNCER=True,
+    )
+    pgbouncer_engine = make_engine(settings)
+    async with pgbouncer_engine.connect() as conn:
+        raw_connection = await conn.get_raw_connection()
+        assert raw_connection.driver_connection.prepare_threshold is None
+        assert await conn.scalar(text("SELECT 1")) == 1
+    await pgbouncer_engine.dispose()
+
+    assert pool_stats(pgbouncer_engine)["pool"] == "NullPool"
+
+
+@pytest.mark.asyncio
+async def test_make_engine_connect_timeout(engine):
+    settings = Settings(
+        DATABASE_URL=engine.url.render_as_string(hide_password=False)
+    )
+    replica = make_engine(settings, name="replica0", connect_timeout=3)
+    async with replica.connect() as conn:
+        raw_connection = await conn.get_raw_connection()
+        params = raw_connection.driver_connection.info.get_parameters()
+    await replica.dispose()
+
+    assert params["connect_timeout"] == "3"
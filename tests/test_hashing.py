@@ -0,0 +1,121 @@
+import os
+import threading
+from http import HTTPStatus
+
+import pytest
+
+from fast_zero.hashing import (
+    Argon2Params,
+    HashingExecutor,
+    HashingUnavailable,
+    calibrate,
+    check_and_update_password,
+    check_password,
+    hash_password,
+    recommend,
+)
+
+
+def test_hash_password_roundtrip():
+    hashed = hash_password("secret")
+    assert hashed != "secret"
+    assert check_password("secret", hashed)
+    assert not check_password("wrong", hashed)
+
+
+@pytest.mark.asyncio
+async def test_executor_runs_job_in_process_pool():
+    executor = HashingExecutor(kind="process", workers=1)
+    try:
+        hashed = await executor.run(hash_password, "secret")
+    finally:
+        executor.shutdown()
+    assert check_password("secret", hashed)
+    assert executor.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_executor_replaces_pool_after_worker_dies():
+    executor = HashingExecutor(kind="process", workers=1)
+    try:
+        with pytest.raises(HashingUnavailable, match="worker died"):
+            await executor.run(os._exit, 1)
+        hashed = await executor.run(hash_password, "secret")
+    finally:
+        executor.shutdown()
+    assert check_password("secret", hashed)
+    assert executor.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_executor_rejects_when_queue_is_full():
+    release = threading.Event()
+    executor = HashingExecutor(
+        kind="thread", workers=1, queue_size=0, timeout=0.05
+    )
+    try:
+        with pytest.raises(HashingUnavailable, match="timed out"):
+            await executor.run(release.wait)
+        # The abandoned job still holds the only slot.
+        with pytest.raises(HashingUnavailable, match="queue is full"):
+            await executor.run(hash_password, "secret")
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_executor_rejects_unknown_kind():
+    with pytest.raises(ValueError, match="Unknown hashing executor kind"):
+        HashingExecutor(kind="gpu")
+
+
+def test_login_returns_503_when_hashing_is_saturated(
+    client, user, monkeypatch
+):
+    async def busy(*args):
+        raise HashingUnavailable("Hashing queue is full")
+
+    monkeypatch.setattr("fast_zero.security.hashing_executor.run", busy)
+    response = client.post(
+        "/auth/token",
+        data={"username": user.email, "password": user.clean_password},
+    )
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_check_and_update_password_rehashes_on_new_params():
+    old = Argon2Params(time_cost=1, memory_cost=1024, parallelism=1)
+    new = Argon2Params(time_cost=2, memory_cost=1024, parallelism=1)
+    hashed = hash_password("secret", old)
+
+    assert check_and_update_password("secret", hashed, old) == (True, None)
+    valid, new_hash = check_and_update_password("secret", hashed, new)
+    assert valid
+    assert "t=2" in new_hash
+    assert check_and_update_password("wrong", hashed, new) == (False, None)
+
+
+def test_calibrate_stops_past_the_target():
+    results = calibrate(
+        target_seconds=0.0,
+        memory_costs=(1024, 2048),
+        time_costs=(1, 2),
+        parallelism=1,
+        samples=2,
+    )
+
+    # The cheapest candidate is already over budget: nothing else runs.
+    assert [params for params, _ in results] == [Argon2Params(1, 1024, 1)]
+    assert recommend(results, 0.0) is None
+
+
+def test_recommend_prefers_the_strongest_candidate_within_target():
+    results = [
+        (Argon2Params(1, 1024, 1), 0.01),
+        (Argon2Params(2, 1024, 1), 0.02),
+        (Argon2Params(1, 4096, 1), 0.03),
+        (Argon2Params(2, 4096, 1), 0.30),
+    ]
+
+    assert recommend(results, 0.25) == Argon2Params(1, 4096, 1)
@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+
+from fast_zero import cli
+from fast_zero.importer import iter_lines
+from fast_zero.models import Todo
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _descriptions(engine):
+    async with engine.connect() as connection:
+        return (await connection.scalars(select(Todo.description))).all()
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_joins_chunks_and_multibyte_characters():
+    encoded = "olá\nmundo\nfim".encode()
+    split = encoded.index(b"\xa1")  # in the middle of "á"
+    lines = [
+        line
+        async for line in iter_lines(_chunks(encoded[:split], encoded[split:]))
+    ]
+    assert lines == ["olá\n", "mundo\n", "fim"]
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_drops_bom_and_keeps_undecodable_lines():
+    lines = [
+        line
+        async for line in iter_lines(_chunks(b"\xef\xbb\xbftitle\n\xffx\n"))
+    ]
+    assert lines[0] == "title\n"
+    assert len(lines) == 2  # noqa: PLR2004
+
+
+def test_cli_import_todos(engine, user, tmp_path, monkeypatch, capsys):
+    path = tmp_path / "todos.ndjson"
+    rows = [
+        {"title": f"t{i}", "description": "", "state": "todo"}
+        for i in range(10)
+    ]
+    rows.append({"title": "bad"})
+    path.write_text("\n".join(json.dumps(row) for row in rows))
+    monkeypatch.setattr(cli, "engine", engine)
+
+    exit_code = cli.main(
+        [
+            "import-todos",
+            str(path),
+            "--user",
+            user.email,
+            "--batch-size",
+            "3",
+        ]
+    )
+
+    assert exit_code == 1
+    out, err = capsys.readouterr()
+    assert out.startswith("Imported 10 todos in ")
+    assert "1 rejected" in out
+    assert err.startswith("line 11: description: Field required")
+
+
+def test_cli_import_todos_unknown_user(engine, session, tmp_path, monkeypatch):
+    path = tmp_path / "todos.csv"
+    path.write_text("title,description,state\n")
+    monkeypatch.setattr(cli, "engine", engine)
+
+    assert cli.main(["import-todos", str(path), "--user", "x@y.com"]) == 1
+
+
+def test_cli_import_todos_csv_with_multiline_field(
+    engine, user, tmp_path, monkeypatch, capsys
+):
+    path = tmp_path / "todos.csv"
+    path.write_text(
+        'title,description,state\nfirst,"line1\nline2",todo\nbad,x\n'
+    )
+    monkeypatch.setattr(cli, "engine", engine)
+
+    exit_code = cli.main(["import-todos", str(path), "--user", user.email])
+
+    assert exit_code == 1
+    out, err = capsys.readouterr()
+    assert out.startswith("Imported 1 todos in ")
+    assert err == "line 4: Expected 3 columns, got 2\n"
+
+
+def test_cli_import_todos_csv_keeps_crlf_in_quoted_fields(
+    engine, user, tmp_path, monkeypatch
+):
+    path = tmp_path / "todos.csv"
+    path.write_bytes(
+        b"\xef\xbb\xbftitle,description,state\r\n"
+        b'first,"line1\r\nline2",todo\r\n'
+    )
+    monkeypatch.setattr(cli, "engine", engine)
+
+    assert cli.main(["import-todos", str(path), "--user", user.email]) == 0
+    assert asyncio.run(_descriptions(engine)) == ["line1\r\nline2"]
@@ -0,0 +1,91 @@
+import logging
+import re
+from http import HTTPStatus
+
+import pytest
+
+from fast_zero.instrumentation import RequestStats
+
+
+def server_timing(response):
+    return {
+        match["name"]: (float(match["dur"]), match["desc"])
+        for match in re.finditer(
+            r'(?P<name>\w+);dur=(?P<dur>[\d.]+)(?:;desc="(?P<desc>[^"]*)")?',
+            response.headers["Server-Timing"],
+        )
+    }
+
+
+def test_server_timing_header_reports_queries(client, user):
+    response = client.get("/users/?fields=username")
+
+    timing = server_timing(response)
+    assert set(timing) == {"db", "hash", "serialize", "total"}
+    assert timing["db"][1] == "1 queries"
+    assert timing["serialize"][0] > 0
+    assert timing["hash"][0] == 0
+
+
+@pytest.mark.parametrize("url", ["/users/", "/"])
+def test_server_timing_times_response_model_serialization(client, user, url):
+    response = client.get(url)
+
+    assert server_timing(response)["serialize"][0] > 0
+
+
+def test_server_timing_header_reports_hashing(client, user):
+    response = client.post(
+        "/auth/token",
+        data={"username": user.email, "password": user.clean_password},
+    )
+
+    assert server_timing(response)["hash"][0] > 0
+
+
+def test_request_log_line(client, caplog):
+    with caplog.at_level(logging.INFO, logger="fast_zero.requests"):
+        client.get("/users/1")
+
+    (record,) = caplog.records
+    assert record.request["route"] == "/users/{user_id}"
+    assert record.request["status"] == HTTPStatus.NOT_FOUND
+    assert record.request["queries"] == 1
+    assert "path=/users/1" in record.getMessage()
+
+
+def test_failed_statements_are_counted(
+    client, user, other_user, token, caplog
+):
+    with caplog.at_level(logging.INFO, logger="fast_zero.requests"):
+        response = client.put(
+            f"/users/{user.id}",
+            headers={"Authorization": f"Bearer {token}"},
+            json={
+                "username": other_user.username,
+                "email": user.email,
+                "password": "secret",
+            },
+        )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    (record,) = caplog.records
+    # Revocation refresh, user lookup and the UPDATE that failed.
+    assert record.request["queries"] == 3  # noqa: PLR2004
+
+
+def test_query_budget_warning(client, user, monkeypatch, caplog):
+    monkeypatch.setattr("fast_zero.instrumentation.settings.QUERY_BUDGET", 0)
+    with caplog.at_level(logging.INFO, logger="fast_zero.requests"):
+        client.get("/users/")
+
+    (warning,) = [r for r in caplog.records if r.levelno == logging.WARNING]
+    assert "ran 1 queries (budget 0)" in warning.getMessage()
+    assert "FROM users" in warning.getMessage()
+
+
+def test_request_stats_server_timing():
+    stats = RequestStats(queries=2, sql_seconds=0.0015)
+    assert stats.server_timing(0.01).startswith(
+        'db;dur=1.50;desc="2 queries", hash;dur=0.00'
+    )
@@ -0,0 +1,57 @@
+import argparse
+
+import httpx
+import pytest
+
+from benchmarks.loadtest import RouteStats, parse_mix, run_load
+from fast_zero.app import app
+from fast_zero.database import get_session
+
+
+def test_parse_mix_drops_zero_weights():
+    assert parse_mix("list=3, create=1,delete=0,login") == {
+        "list": 3,
+        "create": 1,
+        "login": 1,
+    }
+
+
+@pytest.mark.parametrize("mix", ["list=3,explode=1", "list=x", "list=0"])
+def test_parse_mix_rejects_invalid_mixes(mix):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix(mix)
+
+
+def test_route_stats_summary():
+    stats = RouteStats([i / 1000 for i in range(1, 101)], errors=5)
+
+    summary = stats.summary(elapsed=2.0)
+
+    assert summary["requests"] == 100  # noqa: PLR2004
+    assert summary["rps"] == 50  # noqa: PLR2004
+    assert summary["p50_ms"] == pytest.approx(50.5)
+    assert summary["p99_ms"] == pytest.approx(99.01)
+    assert summary["error_rate"] == 0.05  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_run_load_reports_every_operation(session):
+    app.dependency_overrides[get_session] = lambda: session
+    transport = httpx.ASGITransport(app=app)
+    mix = parse_mix("list=1,search=1,create=2,patch=1,delete=1")
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            report = await run_load(
+                client, mix, concurrency=1, duration=2, seed=1
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert {"signup", "login", "create", "total"} <= report.keys()
+    assert report["login"]["requests"] == 1
+    assert report["total"]["error_rate"] == 0
+    assert report["total"]["requests"] == sum(
+        row["requests"] for name, row in report.items() if name != "total"
+    )
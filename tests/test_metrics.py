@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import text
+
+from fast_zero.database import make_engine, pool_stats
+from fast_zero.metrics import Histogram, metrics, render
+from fast_zero.settings import Settings
+
+
+def scrape(client):
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics_count_requests_by_route(client, user):
+    route = 'method="GET",route="/users/{user_id}"'
+    before = scrape(client)
+
+    client.get(f"/users/{user.id}")
+    client.get("/users/999")
+    samples = scrape(client)
+
+    count = f"fast_zero_http_request_duration_seconds_count{{{route}}}"
+    assert samples[count] - before.get(count, 0) == 2  # noqa: PLR2004
+    not_found = f'fast_zero_http_responses_total{{{route},status="404"}}'
+    assert samples[not_found] - before.get(not_found, 0) == 1
+    assert samples["fast_zero_http_requests_in_flight"] == 1
+    assert "fast_zero_hash_queue_depth" in samples
+
+
+def test_metrics_unmatched_routes_share_a_label(client):
+    client.get("/does/not/exist")
+    samples = scrape(client)
+
+    key = (
+        'fast_zero_http_responses_total{method="GET",'
+        'route="unmatched",status="404"}'
+    )
+    assert samples[key] >= 1
+
+
+def test_metrics_auth_cache_hit_ratio(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/auth/refresh_token", headers=headers)
+    client.post("/auth/refresh_token", headers=headers)
+
+    samples = scrape(client)
+    assert samples["fast_zero_auth_cache_hits_total"] == 1
+    assert samples["fast_zero_auth_cache_misses_total"] == 1
+    assert samples["fast_zero_auth_cache_hit_ratio"] == 0.5  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_pool_checkouts_are_recorded_per_engine(engine):
+    settings = Settings(
+        DATABASE_URL=engine.url.render_as_string(hide_password=False)
+    )
+    pooled = make_engine(settings, name="replica9")
+    async with pooled.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    await pooled.dispose()
+
+    assert metrics.pool_checkout["replica9"].count == 1
+    assert pool_stats(pooled)["checkout_count"] == 1
+    assert pool_stats(pooled)["checkout_seconds"] > 0
+    assert 'fast_zero_db_pool_checkout_seconds_count{engine="replica9"} 1' in (
+        render()
+    )
+
+
+def test_histogram_samples_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert list(histogram.samples("h", 'route="/"')) == [
+        'h_bucket{route="/",le="0.1"} 2',
+        'h_bucket{route="/",le="1.0"} 3',
+        'h_bucket{route="/",le="+Inf"} 4',
+        'h_sum{route="/"} 3.65',
+        'h_count{route="/"} 4',
+    ]
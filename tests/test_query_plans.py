@@ -0,0 +1,124 @@
+"""
+Query plan regression suite.
+
+Every statement the routers send is captured while the endpoints are hit
+against a seeded dataset, then re-run under ``EXPLAIN (FORMAT JSON)``.
+Any sequential scan on ``users`` or ``todos`` fails the test.
+"""
+
+from contextlib import contextmanager
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import event, text
+
+SEED_USERS = 1_000
+SEED_TODOS_PER_USER = 100
+SCANNED_TABLES = {"users", "todos"}
+
+
+@contextmanager
+def capture_statements(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, params, *args):
+        *_, executemany = args
+        if statement.lstrip().upper().startswith("INSERT"):
+            return
+        statements.append((statement, params[0] if executemany else params))
+
+    event.listen(
+        engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+    try:
+        yield statements
+    finally:
+        event.remove(
+            engine.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+
+
+def seq_scans(plan):
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+async def seed(session):
+    await session.execute(
+        text(
+            "INSERT INTO users (username, email, password) "
+            "SELECT 'seed' || i, 'seed' || i || '@mail.com', 'x' "
+            "FROM generate_series(1, :users) AS i"
+        ),
+        {"users": SEED_USERS},
+    )
+    await session.execute(
+        text(
+            "INSERT INTO todos (title, description, state, user_id) "
+            "SELECT 'todo ' || i, 'description ' || i, "
+            "(ARRAY['draft', 'todo', 'doing', 'done', 'trash'])"
+            "[1 + i % 5]::todostate, u.id "
+            "FROM users AS u, generate_series(1, :todos) AS i"
+        ),
+        {"todos": SEED_TODOS_PER_USER},
+    )
+    await session.commit()
+    await session.execute(text("ANALYZE users"))
+    await session.execute(text("ANALYZE todos"))
+
+
+@pytest.mark.asyncio
+async def test_router_queries_use_indexes(
+    engine, session, client, user, token
+):
+    await seed(session)
+    todo_id = await session.scalar(
+        text("SELECT max(id) FROM todos WHERE user_id = :id"), {"id": user.id}
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    requests = [
+        ("GET", "/users/", None),
+        ("GET", "/users/?limit=10&cursor=eyJpZCI6NTAwfQ", None),
+        ("GET", f"/users/{user.id}", None),
+        ("GET", "/todos/", None),
+        ("GET", "/todos/?limit=10", None),
+        ("GET", "/todos/?fields=title,state&limit=10", None),
+        ("GET", "/todos/?limit=10&cursor=eyJpZCI6NTB9", None),
+        ("GET", "/todos/?state=done&limit=10", None),
+        ("GET", "/todos/?title=todo 1&description=description", None),
+        ("GET", "/todos/?q=todo", None),
+        ("GET", "/todos/export?format=csv", None),
+        ("PATCH", f"/todos/{todo_id}", {"title": "patched"}),
+        (
+            "PATCH",
+            "/todos/bulk",
+            {"todos": [{"id": todo_id, "state": "done"}]},
+        ),
+        ("DELETE", "/todos/bulk", {"ids": [todo_id - 1, todo_id - 2]}),
+        ("DELETE", f"/todos/{todo_id}", None),
+        ("POST", "/auth/refresh_token", None),
+        ("DELETE", f"/users/{user.id}", None),
+    ]
+
+    with capture_statements(engine) as statements:
+        for method, url, body in requests:
+            response = client.request(method, url, json=body, headers=headers)
+            assert response.status_code < HTTPStatus.BAD_REQUEST, url
+
+    assert statements
+    offenders = []
+    conn = await session.connection()
+    for statement, params in statements:
+        result = await conn.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", params
+        )
+        plan = result.scalar()[0]["Plan"]
+        tables = SCANNED_TABLES.intersection(seq_scans(plan))
+        if tables:
+            offenders.append((sorted(tables), statement))
+
+    assert not offenders
@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+
+from fast_zero.ratelimit import MemoryBackend, Rate, RateLimiter
+from fast_zero.routers import auth
+from fast_zero.security import login_limiter
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_refills_over_time(timer):
+    backend = MemoryBackend(timer=timer)
+    rate = Rate(burst=2, per_minute=6)
+
+    assert await backend.acquire("key", rate) == 0
+    assert await backend.acquire("key", rate) == 0
+    assert await backend.acquire("key", rate) == pytest.approx(10)
+
+    timer.now = 4
+    assert await backend.acquire("key", rate) == pytest.approx(6)
+    timer.now = 10
+    assert await backend.acquire("key", rate) == 0
+    assert await backend.acquire("other", rate) == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(maxsize=2)
+    rate = Rate(burst=1, per_minute=1)
+    for key in ("a", "b", "c"):
+        await backend.acquire(key, rate)
+
+    assert len(backend) == 2  # noqa: PLR2004
+    assert await backend.acquire("a", rate) == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_stops_at_first_empty_bucket():
+    limiter = RateLimiter(
+        MemoryBackend(),
+        {"ip": Rate(burst=1, per_minute=60), "email": Rate(1, 60)},
+    )
+
+    assert await limiter.acquire(ip="1.2.3.4", email="a@mail.com") == 0
+    assert await limiter.acquire(ip="1.2.3.4", email="b@mail.com") > 0
+    # The ip bucket refused first, so b@mail.com still has its token.
+    assert await limiter.acquire(ip="5.6.7.8", email="b@mail.com") == 0
+
+
+async def fail_if_hashed(*args):
+    raise AssertionError("rate limited logins must not hash")
+
+
+@pytest.fixture
+def no_hashing(monkeypatch):
+    monkeypatch.setattr(auth, "verify_and_update_password", fail_if_hashed)
+
+
+def test_login_is_rate_limited_per_email(client, user, monkeypatch):
+    monkeypatch.setitem(login_limiter.rates, "email", Rate(2, 1))
+    data = {"username": user.email, "password": "wrong"}
+    for _ in range(2):
+        response = client.post("/auth/token", data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    monkeypatch.setattr(auth, "verify_and_update_password", fail_if_hashed)
+    data["username"] = user.email.upper()
+    response = client.post("/auth/token", data=data)
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.json() == {
+        "detail": "Too many login attempts, try again later"
+    }
+    assert response.headers["retry-after"] == "60"
+
+
+def test_login_is_rate_limited_per_ip(client, no_hashing, monkeypatch):
+    monkeypatch.setitem(login_limiter.rates, "ip", Rate(0, 30))
+
+    response = client.post(
+        "/auth/token", data={"username": "a@mail.com", "password": "secret"}
+    )
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.headers["retry-after"] == "2"
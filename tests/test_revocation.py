@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from uuid import uuid4
+
+import pytest
+
+from fast_zero.models import RevokedToken
+from fast_zero.revocation import BloomFilter, RevocationList, revoke
+from fast_zero.security import revocations
+
+
+def in_an_hour():
+    return datetime.now().astimezone() + timedelta(hours=1)
+
+
+def login(client, user):
+    response = client.post(
+        "/auth/token",
+        data={"username": user.email, "password": user.clean_password},
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+    keys = [uuid4().hex for _ in range(1_000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum(uuid4().hex in bloom for _ in range(10_000))
+    assert false_positives < 300  # noqa: PLR2004
+
+
+def test_revocation_list_checks_exact_set():
+    revocation_list = RevocationList(capacity=10)
+    revocation_list.add("revoked", in_an_hour())
+
+    assert revocation_list.is_revoked("revoked")
+    assert not revocation_list.is_revoked("other")
+
+
+@pytest.mark.asyncio
+async def test_revocation_list_refreshes_incrementally(session, timer):
+    revocation_list = RevocationList(refresh_interval=5, timer=timer)
+    session.add(RevokedToken(jti="first", expires_at=in_an_hour()))
+    await session.commit()
+
+    await revocation_list.refresh(session)
+    assert revocation_list.is_revoked("first")
+
+    session.add_all(
+        [
+            RevokedToken(jti="second", expires_at=in_an_hour()),
+            RevokedToken(
+                jti="expired",
+                expires_at=datetime.now().astimezone() - timedelta(minutes=1),
+            ),
+        ]
+    )
+    await session.commit()
+    await revocation_list.refresh(session)
+    assert not revocation_list.is_revoked("second")
+
+    timer.now = 5
+    await revocation_list.refresh(session)
+    assert revocation_list.is_revoked("second")
+    assert not revocation_list.is_revoked("expired")
+    assert len(revocation_list) == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_revocation_is_not_enforced(session):
+    await revoke(session, "rolled-back", in_an_hour())
+    await session.rollback()
+
+    await revocations.refresh(session)
+    assert not revocations.is_revoked("rolled-back")
+
+
+def test_logout_revokes_only_the_token_used(client, user):
+    headers = login(client, user)
+    other_headers = login(client, user)
+
+    response = client.post("/auth/logout", headers=headers)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {"message": "Logged out"}
+
+    response = client.get("/todos/", headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    response = client.post("/auth/logout", headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    response = client.get("/todos/", headers=other_headers)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_logout_reaches_other_workers(client, user):
+    headers = login(client, user)
+    client.post("/auth/logout", headers=headers)
+
+    # A fresh worker knows nothing until its first refresh.
+    revocations.clear()
+
+    response = client.get("/todos/", headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
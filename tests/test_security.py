@@ -5,8 +5,14 @@ from fastapi import HTTPException
 from jwt import decode
 
 from fast_zero.security import (
+    Principal,
     create_access_token,
+    get_current_principal,
     get_current_user,
+    revocations,
+    token_claims,
+    token_versions,
+    user_cache,
 )
 from fast_zero.settings import Settings
 
@@ -30,29 +36,162 @@ def test_jwt_invalid_token(client):
     assert response.json() == {"detail": "Could not validate credentials"}
 
 
-def test_get_current_user_not_found_exception(session):
+@pytest.mark.asyncio
+async def test_get_current_user_not_found_exception(session):
     invalid_token = create_access_token(data={"sub": ""})
 
     with pytest.raises(HTTPException) as exc:
-        get_current_user(session, invalid_token)
+        await get_current_user(session, invalid_token)
 
     assert exc.value.status_code == HTTPStatus.UNAUTHORIZED
     assert exc.value.detail == "Could not validate credentials"
     assert exc.value.headers == {"WWW-Authenticate": "Bearer"}
 
 
-def test_get_current_user_not_found_exception_with_invalid_user(session):
+@pytest.mark.asyncio
+async def test_get_current_user_not_found_exception_with_invalid_user(session):
     invalid_token = create_access_token(data={"sub": "invalid_user"})
 
     with pytest.raises(HTTPException) as exc:
-        get_current_user(session, invalid_token)
+        await get_current_user(session, invalid_token)
 
     assert exc.value.status_code == HTTPStatus.UNAUTHORIZED
     assert exc.value.detail == "Could not validate credentials"
     assert exc.value.headers == {"WWW-Authenticate": "Bearer"}
 
 
-def test_get_current_user_with_valid_user(session, user, token):
-    token = create_access_token(data={"sub": user.email})
-    user = get_current_user(session, token)
+@pytest.mark.asyncio
+async def test_get_current_user_with_valid_user(session, user, token):
+    token = create_access_token(data=token_claims(user))
+    user = await get_current_user(session, token)
     assert user.username == user.username
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_is_served_from_cache(session, user):
+    token = create_access_token(data=token_claims(user))
+    await get_current_user(session, token)
+    assert user_cache.misses == 1
+
+    cached = await get_current_user(session, token)
+    assert user_cache.hits == 1
+    assert cached is user
+
+
+def test_cached_user_is_invalidated_on_update(client, user, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.put(
+        f"/users/{user.id}",
+        headers=headers,
+        json={
+            "username": "renamed",
+            "email": "renamed@mail.com",
+            "password": "new_password",
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.delete(f"/users/{user.id}", headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_cached_user_is_invalidated_on_delete(client, user, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.delete(f"/users/{user.id}", headers=headers)
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.delete(f"/users/{user.id}", headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_get_current_principal_skips_database_when_warm(session, user):
+    token = create_access_token(data=token_claims(user))
+    principal = await get_current_principal(session, token)
+    assert principal == Principal(id=user.id, email=user.email)
+
+    # No session at all: a warm cache must not need one.
+    assert await get_current_principal(None, token) == principal
+
+
+@pytest.mark.asyncio
+async def test_get_current_principal_requires_versioned_claims(session, user):
+    token = create_access_token(data={"sub": user.email})
+
+    with pytest.raises(HTTPException) as exc:
+        await get_current_principal(session, token)
+
+    assert exc.value.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_token_rejected_after_password_change(client, user, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/todos/", headers=headers).status_code == HTTPStatus.OK
+
+    client.put(
+        f"/users/{user.id}",
+        headers=headers,
+        json={
+            "username": user.username,
+            "email": user.email,
+            "password": "new_password",
+        },
+    )
+
+    response = client.get("/todos/", headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_token_rejected_after_user_deletion(client, user, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/todos/", headers=headers).status_code == HTTPStatus.OK
+
+    client.delete(f"/users/{user.id}", headers=headers)
+
+    response = client.get("/todos/", headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def auth_statuses(client, headers):
+    """Status codes of a principal route and of a full user route."""
+    return (
+        client.get("/todos/", headers=headers).status_code,
+        client.post("/auth/refresh_token", headers=headers).status_code,
+    )
+
+
+def test_password_change_reaches_other_workers(client, user, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    auth_statuses(client, headers)
+    stale_version = token_versions.get(user.id)
+    stale_snapshot = user_cache.get(user.email)
+
+    client.put(
+        f"/users/{user.id}",
+        headers=headers,
+        json={
+            "username": user.username,
+            "email": user.email,
+            "password": "new_password",
+        },
+    )
+    # Another worker: caches from before the change, revocation list
+    # not pulled yet.
+    token_versions.set(user.id, stale_version)
+    user_cache.set(user.email, stale_snapshot)
+    revocations.clear()
+
+    unauthorized = (HTTPStatus.UNAUTHORIZED, HTTPStatus.UNAUTHORIZED)
+    assert auth_statuses(client, headers) == unauthorized
+
+    response = client.post(
+        "/auth/token",
+        data={"username": user.email, "password": "new_password"},
+    )
+    token = response.json()["access_token"]
+    token_versions.set(user.id, stale_version)
+    user_cache.set(user.email, stale_snapshot)
+    assert auth_statuses(client, {"Authorization": f"Bearer {token}"}) == (
+        HTTPStatus.OK,
+        HTTPStatus.OK,
+    )
@@ -0,0 +1,90 @@
+import json
+from datetime import datetime
+from http import HTTPStatus
+
+import pytest
+from fastapi.responses import JSONResponse
+
+from fast_zero import serialization
+from fast_zero.models import Todo, TodoState, User
+from fast_zero.schemas import TodoListSchema, UserList
+from fast_zero.serialization import todo_list_response, user_list_response
+
+
+def make_todo(todo_id):
+    todo = Todo(
+        title=f"todo {todo_id}",
+        description="ção",
+        state=TodoState.doing,
+        user_id=1,
+    )
+    todo.id = todo_id
+    todo.created_at = datetime(2024, 7, 14, 12, 0, 0)
+    todo.updated_at = datetime(2024, 7, 14, 12, 30, 0, 123456)
+    return todo
+
+
+def make_user(user_id):
+    user = User(
+        username=f"user{user_id}",
+        email=f"user{user_id}@mail.com",
+        password="hash",
+    )
+    user.id = user_id
+    user.created_at = user.updated_at = datetime(2024, 7, 14, 12, 0, 0)
+    return user
+
+
+def response_model_body(model, content):
+    validated = model.model_validate(content, from_attributes=True)
+    return JSONResponse(validated.model_dump(mode="json")).body
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_todo_list_matches_response_model(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    todos = [make_todo(i) for i in range(3)]
+
+    fast = todo_list_response(todos, "abc").body
+    expected = response_model_body(
+        TodoListSchema, {"todos": todos, "next_cursor": "abc"}
+    )
+    assert json.loads(fast) == json.loads(expected)
+
+
+def test_user_list_matches_response_model():
+    users = [make_user(i) for i in range(3)]
+
+    fast = user_list_response(users).body
+    expected = response_model_body(UserList, {"users": users})
+    assert json.loads(fast) == json.loads(expected)
+    assert "password" not in json.loads(fast)["users"][0]
+
+
+def test_dumps_rejects_unknown_types(monkeypatch):
+    monkeypatch.setattr(serialization, "orjson", None)
+    with pytest.raises(TypeError):
+        serialization.dumps({"value": object()})
+
+
+@pytest.mark.asyncio
+async def test_fast_responses_mode(session, client, user, token, monkeypatch):
+    session.add(make_todo(1))
+    await session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+    regular = client.get("/todos/", headers=headers)
+
+    monkeypatch.setattr(
+        "fast_zero.routers.todos.settings.FAST_RESPONSES", True
+    )
+    monkeypatch.setattr(
+        "fast_zero.routers.users.settings.FAST_RESPONSES", True
+    )
+    fast = client.get("/todos/", headers=headers)
+    assert fast.status_code == HTTPStatus.OK
+    assert fast.json() == regular.json()
+    assert fast.headers["ETag"] == regular.headers["ETag"]
+
+    users = client.get("/users/")
+    assert users.json()["users"][0]["email"] == user.email
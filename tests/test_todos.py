@@ -1,9 +1,14 @@
+import csv
+import io
+import json
 from datetime import datetime
 from http import HTTPStatus
 
 import factory.fuzzy
+import pytest
+from sqlalchemy import select
 
-from fast_zero.models import Todo, TodoState
+from fast_zero.models import Todo, TodoState, User
 
 
 class TodoFactory(factory.Factory):
@@ -37,10 +42,11 @@ def test_create_todo(client, token):
     assert datetime.fromisoformat(response_data["created_at"])
 
 
-def test_list_todos_should_return_5_todos(session, client, user, token):
+@pytest.mark.asyncio
+async def test_list_todos_should_return_5_todos(session, client, user, token):
     expected_todos = 5
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
     response = client.get(
         "/todos/",
         headers={"Authorization": f"Bearer {token}"},
@@ -49,12 +55,13 @@ def test_list_todos_should_return_5_todos(session, client, user, token):
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todos_pagination_should_return_2_todos(
+@pytest.mark.asyncio
+async def test_list_todos_pagination_should_return_2_todos(
     session, user, client, token
 ):
     expected_todos = 2
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
     response = client.get(
         "/todos/?offset=1&limit=2",
         headers={"Authorization": f"Bearer {token}"},
@@ -63,14 +70,15 @@ def test_list_todos_pagination_should_return_2_todos(
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todos_filter_title_should_return_5_todos(
+@pytest.mark.asyncio
+async def test_list_todos_filter_title_should_return_5_todos(
     session, user, client, token
 ):
     expected_todos = 5
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(5, user_id=user.id, title="Test todo 1")
     )
-    session.commit()
+    await session.commit()
 
     response = client.get(
         "/todos/?title=Test todo 1",
@@ -79,14 +87,15 @@ def test_list_todos_filter_title_should_return_5_todos(
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todos_filter_description_should_return_5_todos(
+@pytest.mark.asyncio
+async def test_list_todos_filter_description_should_return_5_todos(
     session, user, client, token
 ):
     expected_todos = 5
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(5, user_id=user.id, description="description")
     )
-    session.commit()
+    await session.commit()
 
     response = client.get(
         "/todos/?description=desc",
@@ -95,14 +104,15 @@ def test_list_todos_filter_description_should_return_5_todos(
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todos_filter_state_should_return_5_todos(
+@pytest.mark.asyncio
+async def test_list_todos_filter_state_should_return_5_todos(
     session, user, client, token
 ):
     expected_todos = 5
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(5, user_id=user.id, state=TodoState.draft)
     )
-    session.commit()
+    await session.commit()
 
     response = client.get(
         "/todos/?state=draft",
@@ -111,11 +121,12 @@ def test_list_todos_filter_state_should_return_5_todos(
     assert len(response.json()["todos"]) == expected_todos
 
 
-def test_list_todos_filter_combined_should_return_5_todos(
+@pytest.mark.asyncio
+async def test_list_todos_filter_combined_should_return_5_todos(
     session, user, client, token
 ):
     expected_todos = 5
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(
             5,
             user_id=user.id,
@@ -124,7 +135,7 @@ def test_list_todos_filter_combined_should_return_5_todos(
             state=TodoState.done,
         )
     )
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(
             3,
             user_id=user.id,
@@ -133,7 +144,7 @@ def test_list_todos_filter_combined_should_return_5_todos(
             state=TodoState.todo,
         )
     )
-    session.commit()
+    await session.commit()
     response = client.get(
         "/todos/?title=Test todo combined&description=combined&state=done",
         headers={"Authorization": f"Bearer {token}"},
@@ -141,6 +152,99 @@ def test_list_todos_filter_combined_should_return_5_todos(
     assert len(response.json()["todos"]) == expected_todos
 
 
+@pytest.mark.asyncio
+async def test_list_todos_cursor_pagination(session, user, client, token):
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    seen = []
+    url = "/todos/?limit=2"
+    while url:
+        page = client.get(url, headers=headers).json()
+        seen.extend(todo["id"] for todo in page["todos"])
+        cursor = page["next_cursor"]
+        url = f"/todos/?limit=2&cursor={cursor}" if cursor else None
+
+    assert seen == [1, 2, 3, 4, 5]
+
+
+def test_list_todos_invalid_cursor(client, token):
+    response = client.get(
+        "/todos/?cursor=e30",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+@pytest.mark.asyncio
+async def test_list_todos_sparse_fields(session, user, client, token):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+
+    response = client.get(
+        "/todos/?fields=state,title&limit=2",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    page = response.json()
+    assert response.status_code == HTTPStatus.OK
+    assert [set(todo) for todo in page["todos"]] == [
+        {"id", "title", "state"},
+        {"id", "title", "state"},
+    ]
+    assert page["next_cursor"]
+
+
+def test_list_todos_unknown_fields(client, token):
+    response = client.get(
+        "/todos/?fields=title,password,user_id",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {"detail": "Unknown fields: password, user_id"}
+
+
+@pytest.mark.asyncio
+async def test_list_todos_search_ranks_title_matches_first(
+    session, user, client, token
+):
+    session.add_all([
+        TodoFactory(
+            user_id=user.id,
+            title="Buy milk",
+            description="groceries for the week",
+        ),
+        TodoFactory(
+            user_id=user.id,
+            title="Groceries",
+            description="remember the milk",
+        ),
+        TodoFactory(
+            user_id=user.id, title="Call mom", description="sunday"
+        ),
+    ])
+    await session.commit()
+
+    response = client.get(
+        "/todos/?q=milk",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == HTTPStatus.OK
+    titles = [todo["title"] for todo in response.json()["todos"]]
+    assert titles == ["Buy milk", "Groceries"]
+    assert response.json()["next_cursor"] is None
+
+
+def test_list_todos_search_rejects_cursor(client, token):
+    response = client.get(
+        "/todos/?q=milk&cursor=eyJpZCI6MX0",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
 def test_patch_todo_error(client, token):
     response = client.patch(
         "/todos/10",
@@ -151,10 +255,11 @@ def test_patch_todo_error(client, token):
     assert response.json() == {"detail": "Task not found."}
 
 
-def test_patch_todo(session, client, user, token):
+@pytest.mark.asyncio
+async def test_patch_todo(session, client, user, token):
     todo = TodoFactory(user_id=user.id)
     session.add(todo)
-    session.commit()
+    await session.commit()
     response = client.patch(
         f"/todos/{todo.id}",
         json={"title": "teste!"},
@@ -164,11 +269,34 @@ def test_patch_todo(session, client, user, token):
     assert response.json()["title"] == "teste!"
 
 
-def test_delete_todo(session, client, user, token):
+@pytest.mark.asyncio
+async def test_patch_todo_bumps_list_etag_once(session, client, user, token):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+    etag = client.get("/todos/", headers=headers).headers["ETag"]
+
+    response = client.patch(f"/todos/{todo.id}", json={}, headers=headers)
+    assert response.json()["title"] == todo.title
+    response = client.get(
+        "/todos/", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    client.patch(f"/todos/{todo.id}", json={"state": "done"}, headers=headers)
+    version = await session.scalar(
+        select(User.todos_version).where(User.id == user.id)
+    )
+    assert version == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_todo(session, client, user, token):
     todo = TodoFactory(user_id=user.id)
 
     session.add(todo)
-    session.commit()
+    await session.commit()
 
     response = client.delete(
         f'/todos/{todo.id}', headers={'Authorization': f'Bearer {token}'}
@@ -187,3 +315,294 @@ def test_delete_todo_error(client, token):
 
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert response.json() == {'detail': 'Task not found.'}
+
+
+def test_create_todos_bulk(client, token):
+    payload = {
+        "todos": [
+            {"title": f"todo {i}", "description": "bulk", "state": "todo"}
+            for i in range(3)
+        ]
+    }
+    response = client.post(
+        "/todos/bulk",
+        json=payload,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == HTTPStatus.OK
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["created"] * 3
+    assert [r["todo"]["title"] for r in results] == [
+        "todo 0",
+        "todo 1",
+        "todo 2",
+    ]
+    assert [r["id"] for r in results] == [1, 2, 3]
+
+
+def test_create_todos_bulk_rejects_empty_list(client, token):
+    response = client.post(
+        "/todos/bulk",
+        json={"todos": []},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_patch_todos_bulk(session, client, user, other_user, token):
+    mine = TodoFactory(user_id=user.id, title="mine", state=TodoState.todo)
+    theirs = TodoFactory(user_id=other_user.id, title="theirs")
+    session.add_all([mine, theirs])
+    await session.commit()
+
+    response = client.patch(
+        "/todos/bulk",
+        json={
+            "todos": [
+                {"id": mine.id, "state": "done"},
+                {"id": theirs.id, "title": "hijacked"},
+                {"id": 999, "title": "missing"},
+            ]
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == HTTPStatus.OK
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [
+        "updated",
+        "not_found",
+        "not_found",
+    ]
+    assert results[0]["todo"]["state"] == "done"
+    assert results[0]["todo"]["title"] == "mine"
+
+    await session.refresh(theirs)
+    assert theirs.title == "theirs"
+
+
+@pytest.mark.asyncio
+async def test_delete_todos_bulk(session, client, user, other_user, token):
+    mine = TodoFactory.create_batch(2, user_id=user.id)
+    theirs = TodoFactory(user_id=other_user.id)
+    session.add_all([*mine, theirs])
+    await session.commit()
+
+    response = client.request(
+        "DELETE",
+        "/todos/bulk",
+        json={"ids": [mine[0].id, mine[1].id, theirs.id]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["results"] == [
+        {"id": mine[0].id, "status": "deleted", "todo": None},
+        {"id": mine[1].id, "status": "deleted", "todo": None},
+        {"id": theirs.id, "status": "not_found", "todo": None},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_todos_ndjson(session, client, user, other_user, token):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    session.add(TodoFactory(user_id=other_user.id))
+    await session.commit()
+
+    response = client.get(
+        "/todos/export", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [1, 2, 3]
+    assert set(rows[0]) == {
+        "id",
+        "title",
+        "description",
+        "state",
+        "created_at",
+        "updated_at",
+    }
+
+
+@pytest.mark.asyncio
+async def test_export_todos_csv(session, client, user, token):
+    session.add(
+        TodoFactory(
+            user_id=user.id,
+            title="a, b",
+            description='say "hi"',
+            state=TodoState.doing,
+        )
+    )
+    await session.commit()
+
+    response = client.get(
+        "/todos/export?format=csv",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"].startswith("text/csv")
+    header, row = list(csv.reader(io.StringIO(response.text)))
+    assert header == [
+        "id",
+        "title",
+        "description",
+        "state",
+        "created_at",
+        "updated_at",
+    ]
+    assert row[:4] == ["1", "a, b", 'say "hi"', "doing"]
+
+
+def test_export_todos_rejects_unknown_format(client, token):
+    response = client.get(
+        "/todos/export?format=xml",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_import_todos_ndjson(session, client, user, token):
+    lines = [
+        json.dumps({"title": "a", "description": "x", "state": "todo"}),
+        "",
+        json.dumps({"title": "b", "description": "y", "state": "bogus"}),
+        "not json",
+        json.dumps({"title": "c", "description": "z", "state": "done"}),
+    ]
+    response = client.post(
+        "/todos/import",
+        content="\n".join(lines),
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == HTTPStatus.OK
+    report = response.json()
+    assert report["imported"] == 2  # noqa: PLR2004
+    assert report["failed"] == 2  # noqa: PLR2004
+    assert [error["line"] for error in report["errors"]] == [3, 4]
+    assert report["errors"][0]["error"].startswith("state:")
+
+    todos = await session.scalars(
+        select(Todo).where(Todo.user_id == user.id).order_by(Todo.id)
+    )
+    assert [todo.title for todo in todos] == ["a", "c"]
+
+
+def test_import_todos_csv(client, token):
+    body = (
+        "title,description,state\r\n"
+        'first,"with, comma",draft\r\n'
+        "second,short\r\n"
+    )
+    response = client.post(
+        "/todos/import?format=csv",
+        content=body,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    report = response.json()
+    assert report["imported"] == 1
+    assert report["errors"] == [
+        {"line": 3, "error": "Expected 3 columns, got 2"}
+    ]
+    todos = client.get(
+        "/todos/", headers={"Authorization": f"Bearer {token}"}
+    ).json()["todos"]
+    assert todos[0]["description"] == "with, comma"
+
+
+def test_import_todos_reports_undecodable_and_nul_lines(client, token):
+    body = (
+        b"\xef\xbb\xbftitle,description,state\n"
+        b"ok,fine,todo\n"
+        b"bad,\xff,todo\n"
+        b'nul,"a\x00b",todo\n'
+    )
+    response = client.post(
+        "/todos/import?format=csv",
+        content=body,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.json()["imported"] == 1
+    assert response.json()["errors"] == [
+        {"line": 3, "error": "Invalid UTF-8"},
+        {"line": 4, "error": "NUL characters are not allowed"},
+    ]
+
+
+def test_import_todos_csv_round_trips_export(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post(
+        "/todos/",
+        headers=headers,
+        json={
+            "title": 'say "hi"',
+            "description": "line1\nline2",
+            "state": "doing",
+        },
+    )
+    exported = client.get("/todos/export?format=csv", headers=headers).text
+
+    response = client.post(
+        "/todos/import?format=csv", content=exported, headers=headers
+    )
+
+    assert response.json()["imported"] == 1
+    assert response.json()["errors"] == []
+    todos = client.get("/todos/", headers=headers).json()["todos"]
+    assert [todo["description"] for todo in todos] == ["line1\nline2"] * 2
+
+
+def test_list_todos_etag_revalidation(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/todos/", headers=headers)
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    response = client.get(
+        "/todos/", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert not response.content
+
+    client.post(
+        "/todos/",
+        headers=headers,
+        json={"title": "new", "description": "", "state": "todo"},
+    )
+    response = client.get(
+        "/todos/", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["ETag"] != etag
+    assert len(response.json()["todos"]) == 1
+
+
+def test_list_todos_etag_depends_on_query(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    etag = client.get("/todos/", headers=headers).headers["ETag"]
+    response = client.get(
+        "/todos/?state=done", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_list_todos_does_not_hydrate_orm_objects(
+    session, client, user, token
+):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+    session.expunge_all()
+
+    response = client.get(
+        "/todos/", headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert len(response.json()["todos"]) == 3  # noqa: PLR2004
+    assert not [
+        obj for obj in session.identity_map.values() if isinstance(obj, Todo)
+    ]
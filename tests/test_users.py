@@ -1,7 +1,10 @@
 from datetime import datetime
 from http import HTTPStatus
 
+import pytest
+
 from fast_zero.schemas import UserPublic
+from tests.conftest import UserFactory
 
 
 def test_create_user(client):
@@ -63,7 +66,7 @@ def test_read_user(client, user):
 
 def test_read_users(client):
     """Test UserList response"""
-    expected = {"users": []}
+    expected = {"users": [], "next_cursor": None}
     response = client.get("/users/")
     assert response.status_code == HTTPStatus.OK
     assert response.json() == expected
@@ -86,6 +89,87 @@ def test_read_user_with_users(client, user):
     datetime.fromisoformat(returned_user["updated_at"])
 
 
+@pytest.mark.asyncio
+async def test_read_users_cursor_pagination(session, client):
+    session.add_all(UserFactory.create_batch(5))
+    await session.commit()
+
+    response = client.get("/users/?limit=2")
+    page = response.json()
+    assert [u["id"] for u in page["users"]] == [1, 2]
+    assert page["next_cursor"]
+
+    response = client.get(f"/users/?limit=2&cursor={page['next_cursor']}")
+    page = response.json()
+    assert [u["id"] for u in page["users"]] == [3, 4]
+
+    response = client.get(f"/users/?limit=2&cursor={page['next_cursor']}")
+    page = response.json()
+    assert [u["id"] for u in page["users"]] == [5]
+    assert page["next_cursor"] is None
+
+
+def test_read_users_invalid_cursor(client):
+    response = client.get("/users/?cursor=not-a-cursor")
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+def test_read_user_etag_revalidation(client, user, token):
+    response = client.get(f"/users/{user.id}")
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    response = client.get(f"/users/{user.id}", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    response = client.get(
+        f"/users/{user.id}", headers={"If-None-Match": f'"other", W/{etag}'}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    client.put(
+        f"/users/{user.id}",
+        headers={"Authorization": f"Bearer {token}"},
+        json={
+            "username": "changed",
+            "email": "changed@mail.com",
+            "password": "secret",
+        },
+    )
+    response = client.get(f"/users/{user.id}", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["username"] == "changed"
+
+
+def test_read_users_sparse_fields(client, user):
+    response = client.get("/users/?fields=username")
+    assert response.json() == {
+        "users": [{"id": user.id, "username": user.username}],
+        "next_cursor": None,
+    }
+
+
+def test_read_user_sparse_fields(client, user):
+    full = client.get(f"/users/{user.id}")
+    response = client.get(f"/users/{user.id}?fields=email")
+
+    assert response.json() == {"id": user.id, "email": user.email}
+    assert response.headers["ETag"] != full.headers["ETag"]
+
+    response = client.get(
+        f"/users/{user.id}?fields=email",
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_read_user_unknown_fields(client, user):
+    response = client.get(f"/users/{user.id}?fields=password")
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {"detail": "Unknown fields: password"}
+
+
 def test_read_user_not_found(client, user):
     response = client.get("/users/10")
     assert response.status_code == HTTPStatus.NOT_FOUND
@@ -110,6 +194,29 @@ def test_update_user(client, user, token):
     assert response_data["email"] == expected["email"]
 
 
+def test_update_user_duplicate_fields(client, user, other_user, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    # The app rolls back the shared session, expiring the fixtures.
+    url, data = f"/users/{user.id}", {"email": user.email, "password": "x"}
+    taken_username, taken_email = other_user.username, other_user.email
+
+    response = client.put(
+        url,
+        json={**data, "username": taken_username},
+        headers=headers,
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {"detail": "Username already exists."}
+
+    response = client.put(
+        url,
+        json={**data, "username": "fresh", "email": taken_email},
+        headers=headers,
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {"detail": "Email already exists."}
+
+
 def test_update_user_no_permissions_returns_forbidden(
     client, other_user, token
 ):
@@ -145,3 +252,13 @@ def test_delete_user_no_permissions_returns_forbidden(
     response = client.delete(f"/users/{other_user.id}", headers=headers)
     assert response.status_code == HTTPStatus.FORBIDDEN
     assert response.json() == {"detail": "Not enough permissions"}
+
+
+@pytest.mark.asyncio
+async def test_read_users_does_not_hydrate_orm_objects(session, client, user):
+    session.expunge_all()
+
+    response = client.get("/users/")
+
+    assert response.json()["users"][0]["id"] == user.id
+    assert not list(session.identity_map.values())